@@ -1,11 +1,25 @@
+from collections import OrderedDict
+from concurrent.futures import Executor
 from datetime import datetime, timedelta, timezone
 import json
-from typing import Any, Dict, List
+import orjson
+import threading
+import time
+from typing import Any, Dict, List, Optional
 from bson import ObjectId
-from pymongo import DESCENDING, MongoClient, TEXT
+from pymongo import DESCENDING, MongoClient, TEXT, UpdateOne
 import logging
 logger = logging.getLogger(__name__)
 
+# Sorted keys give semantically equal queries the same context cache key
+_CACHE_KEY_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+# Fixed timeframe offsets; stored timestamps and the "now" they're subtracted from are both UTC
+_ONE_HOUR = timedelta(hours=1)
+_THREE_DAYS = timedelta(days=3)
+_TWO_WEEKS = timedelta(weeks=2)
+_THIRTY_DAYS = timedelta(days=30)
+
 
 class CarlosDatabaseHandler:
     """Handles database operations for the Carlos AI system."""
@@ -23,30 +37,100 @@ class CarlosDatabaseHandler:
         }
     }
 
-    def __init__(self, mongo_uri: str, username: str):
-        """Initialize database handler for a specific user."""
-        self.client = MongoClient(mongo_uri)
+    # (field, alias) -> expanded values, flattened from ENUM_MAPS for single-lookup expansion
+    _ENUM_LOOKUP = {
+        (field, alias): values
+        for field, aliases in ENUM_MAPS.items()
+        for alias, values in aliases.items()
+    }
+
+    # Fields read downstream from retrieved conversation turns
+    CONVERSATION_PROJECTION = {
+        "_id": 0,
+        "timestamp": 1,
+        "user_input": 1,
+        "assistant_response": 1,
+        "entities": 1,
+        "semantic_tags": 1,
+        "user_input_summary": 1,
+        "assistant_response_summary": 1
+    }
+
+    # Start of each named timeframe relative to now; only the requested one is computed
+    TIMEFRAME_STARTS = {
+        "last_hour": lambda now: now - _ONE_HOUR,
+        "today": lambda now: now.replace(hour=0, minute=0, second=0, microsecond=0),
+        "this_week": lambda now: (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0),
+        "recent": lambda now: now - _THREE_DAYS,
+        "weeks": lambda now: now - _TWO_WEEKS,
+        "months": lambda now: now - _THIRTY_DAYS
+    }
+
+    # Short-lived cache for repeated curator queries within a session
+    CONTEXT_CACHE_TTL = 30  # seconds
+    CONTEXT_CACHE_SIZE = 256
+
+    def __init__(self, mongo_uri: str, username: str, event_listeners: Optional[List[Any]] = None, client: Optional[MongoClient] = None):
+        """Initialize database handler for a specific user.
+
+        By default the handler builds and owns its MongoClient, with event_listeners as its pymongo monitors.
+        A caller-owned client can be passed instead; close() then leaves it open.
+        """
+        self._owns_client = client is None
+        self.client = client if client is not None else self.make_client(mongo_uri, f"carlos-{username}", event_listeners)
         self.username = username
         self.db_name = f"carlos_{username}"
         self.db = self.client[self.db_name]
+        self._collections = {}
+        self._context_cache = OrderedDict()  # key -> (expires_at, collection_name, results)
+        self._context_cache_lock = threading.Lock()
+        # Bumped on every invalidation so queries that raced a write don't cache what they read
+        self._context_generation = 0
         self._ensure_indexes()
         print(f"✓ Database handler initialized for user '{username}' on DB '{self.db_name}'")
 
+    @staticmethod
+    def make_client(mongo_uri: str, appname: str, event_listeners: Optional[List[Any]] = None) -> MongoClient:
+        """Build a MongoClient with the settings every Carlos connection uses."""
+        return MongoClient(
+            mongo_uri,
+            compressors="zstd,zlib",  # zstd preferred, zlib ships with Python as fallback
+            retryWrites=True,
+            w="majority",
+            maxPoolSize=32,
+            appname=appname,
+            event_listeners=event_listeners or []
+        )
+
+    def close(self):
+        """Close this handler's MongoDB client and its connection pool, unless the client was passed in."""
+        if self._owns_client:
+            self.client.close()
+
     def _ensure_indexes(self):
         """Create indexes for better query performance."""
         try:
             # Conversations collection indexes
             conversations = self.get_collection("conversations")
             conversations.create_index([("timestamp", DESCENDING)])
+            # Every read filters on user_id and sorts newest first (equality, then sort)
+            conversations.create_index([("user_id", 1), ("timestamp", DESCENDING)])
             conversations.create_index([("entities", TEXT)])
             conversations.create_index([("semantic_tags", 1)])
+            # retrieve_from_conversations matches entities with $in, which the text index can't serve
+            conversations.create_index([("user_id", 1), ("entities", 1), ("timestamp", DESCENDING)])
             
             # Events collection indexes
             events = self.get_collection("events")
             events.create_index([("timestamp", DESCENDING)])
+            events.create_index([("user_id", 1), ("timestamp", DESCENDING)])
             events.create_index([("related_entities", 1)])
             events.create_index([("type", 1)])
             
+            # Entities collection index
+            entities = self.get_collection("entities")
+            entities.create_index([("user_id", 1), ("timestamp", DESCENDING)])
+            
             # User state collection index
             user_state = self.get_collection("user_state")
             user_state.create_index([("user_id", 1)])
@@ -56,61 +140,134 @@ class CarlosDatabaseHandler:
             logger.warning(f"Index creation warning: {e}")
 
     def get_collection(self, collection_name: str):
-        """Get a MongoDB collection by name."""
-        return self.db[collection_name]
+        """Get a MongoDB collection by name, reusing the handle after the first lookup."""
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            collection = self._collections.setdefault(collection_name, self.db[collection_name])
+        return collection
+
+    def _context_cache_get(self, key: bytes):
+        """Return cached results for key, or None if missing or expired."""
+        with self._context_cache_lock:
+            entry = self._context_cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._context_cache[key]
+                return None
+            self._context_cache.move_to_end(key)
+            return list(entry[2])
+
+    def _context_cache_put(self, key: bytes, collection_name: str, results: List[Dict[str, Any]], generation: int):
+        """Store results for key, evicting the least recently used entries past the size cap.
+
+        Results read before a later invalidation (generation mismatch) are not cached.
+        """
+        with self._context_cache_lock:
+            if generation != self._context_generation:
+                return
+            self._context_cache[key] = (time.monotonic() + self.CONTEXT_CACHE_TTL, collection_name, list(results))
+            self._context_cache.move_to_end(key)
+            while len(self._context_cache) > self.CONTEXT_CACHE_SIZE:
+                self._context_cache.popitem(last=False)
+
+    def _invalidate_context_cache(self, *collection_names: str):
+        """Drop cached results for collections that were just written to."""
+        with self._context_cache_lock:
+            self._context_generation += 1
+            stale = [key for key, entry in self._context_cache.items() if entry[1] in collection_names]
+            for key in stale:
+                del self._context_cache[key]
 
     def _get_timeframe_query(self, timeframe: str) -> Dict[str, Any]:
         """Generate MongoDB timestamp query from timeframe string."""
-        now = datetime.now(timezone.utc)
-        time_query = {}
-        
-        timeframe_map = {
-            "last_hour": now - timedelta(hours=1),
-            "today": now.replace(hour=0, minute=0, second=0, microsecond=0),
-            "this_week": (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0),
-            "recent": now - timedelta(days=3),
-            "weeks": now - timedelta(weeks=2),
-            "months": now - timedelta(days=30)
-        }
-        
-        if timeframe in timeframe_map:
-            time_query = {"$gte": timeframe_map[timeframe]}
-        
-        return {"timestamp": time_query} if time_query else {}
+        start = self.TIMEFRAME_STARTS.get(timeframe)
+        if start is None:
+            return {}
+        return {"timestamp": {"$gte": start(datetime.now(timezone.utc))}}
 
     def _expand_query(self, query: Dict[str, Any]) -> Dict[str, Any]:
-        """Recursively expand query using ENUM_MAPS and handle nested fields."""
+        """Expand query using ENUM_MAPS and handle nested fields, walking nested dicts iteratively."""
         expanded_query = {}
-        for field, value in query.items():
-            if isinstance(value, dict):
-                expanded_query[field] = self._expand_query(value)
-            elif field in self.ENUM_MAPS and value in self.ENUM_MAPS[field]:
-                expanded_query[field] = {"$in": self.ENUM_MAPS[field][value]}
-            # Handle nested user_state queries
-            elif field == "travel_history" and isinstance(value, str):
-                # Convert to array contains query
-                expanded_query[f"travel_history.{value}"] = {"$exists": True}
-            else:
-                expanded_query[field] = value
+        stack = [(query, expanded_query)]
+        while stack:
+            source, target = stack.pop()
+            for field, value in source.items():
+                if isinstance(value, dict):
+                    target[field] = {}
+                    stack.append((value, target[field]))
+                elif isinstance(value, str) and (field, value) in self._ENUM_LOOKUP:
+                    target[field] = {"$in": self._ENUM_LOOKUP[(field, value)]}
+                # Handle nested user_state queries
+                elif field == "travel_history" and isinstance(value, str):
+                    # Convert to array contains query
+                    target[f"travel_history.{value}"] = {"$exists": True}
+                else:
+                    target[field] = value
         return expanded_query
 
-    def store_conversation(self, user_input: str, assistant_response: str, entities: List[str] = None, semantic_tags: List[str] = None):
-        """Store a conversation turn in the database."""
+    def _conversation_doc(self, user_input: str, assistant_response: str, entities: List[str] = None, semantic_tags: List[str] = None,
+                          user_input_summary: Optional[str] = None, assistant_response_summary: Optional[str] = None) -> Dict[str, Any]:
         conversation_doc = {
             "user_id": self.username,
             "timestamp": datetime.now(timezone.utc),
             "user_input": user_input,
             "assistant_response": assistant_response,
-            "entities": entities or [],
-            "semantic_tags": semantic_tags or [],
+            # Order-preserving dedupe so repeated mentions don't inflate $in matches
+            "entities": list(dict.fromkeys(entities or [])),
+            "semantic_tags": list(dict.fromkeys(semantic_tags or [])),
             "sentiment": "neutral"  # Could be enhanced with sentiment analysis
         }
+        if user_input_summary is not None:
+            conversation_doc["user_input_summary"] = user_input_summary
+        if assistant_response_summary is not None:
+            conversation_doc["assistant_response_summary"] = assistant_response_summary
+        return conversation_doc
+
+    def store_conversation(self, user_input: str, assistant_response: str, entities: List[str] = None, semantic_tags: List[str] = None,
+                           user_input_summary: Optional[str] = None, assistant_response_summary: Optional[str] = None):
+        """Store a conversation turn in the database, with precomputed summaries of long fields if given."""
+        conversation_doc = self._conversation_doc(user_input, assistant_response, entities, semantic_tags,
+                                                  user_input_summary, assistant_response_summary)
         
         collection = self.get_collection("conversations")
         result = collection.insert_one(conversation_doc)
+        self._invalidate_context_cache("conversations")
         logger.info(f"Stored conversation with ID: {result.inserted_id}")
         return result.inserted_id
 
+    def store_conversations_bulk(self, conversations: List[Dict[str, Any]]):
+        """Store several conversation turns (keyword dicts as for store_conversation) in one round trip."""
+        if not conversations:
+            return []
+        docs = [self._conversation_doc(**conversation) for conversation in conversations]
+        
+        collection = self.get_collection("conversations")
+        result = collection.insert_many(docs, ordered=False)
+        self._invalidate_context_cache("conversations")
+        logger.info(f"Stored {len(result.inserted_ids)} conversations")
+        return result.inserted_ids
+
+    def add_conversation_summaries(self, summaries: Dict[ObjectId, Dict[str, str]]):
+        """Attach *_summary fields to already stored conversation turns, keyed by turn ID."""
+        if not summaries:
+            return
+        collection = self.get_collection("conversations")
+        collection.bulk_write(
+            [UpdateOne({"_id": conversation_id}, {"$set": fields}) for conversation_id, fields in summaries.items()],
+            ordered=False
+        )
+        self._invalidate_context_cache("conversations")
+        logger.info(f"Added summaries to {len(summaries)} conversations")
+
+    @staticmethod
+    def fresh_data_collections(fresh_data: Dict[str, Any]) -> set:
+        """Names of the collections process_and_store_data would write for this fresh data."""
+        written = {name for name in ("entities", "events") if fresh_data.get(name)}
+        if fresh_data.get("user_state_updates") or fresh_data.get("key_value_facts"):
+            written.add("user_state")
+        return written
+
     def process_and_store_data(self, fresh_data: Dict[str, Any]):
         """Store new information from curator's output."""
         logger.info("Storing fresh data from curator...")
@@ -183,6 +340,9 @@ class CarlosDatabaseHandler:
         except Exception as e:
             logger.error(f"Error storing data: {e}")
             raise
+        finally:
+            if stored_counts:
+                self._invalidate_context_cache(*stored_counts.keys())
 
     def retrieve_context(self, retrieval_queries: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Execute queries to fetch relevant context."""
@@ -202,6 +362,15 @@ class CarlosDatabaseHandler:
                 logger.warning(f"Skipping query '{purpose}' - missing collection")
                 continue
 
+            limit = item.get("limit", 10)
+            cache_key = orjson.dumps([collection_name, query, timeframe, limit], default=mongo_json_default, option=_CACHE_KEY_OPTIONS)
+            cached = self._context_cache_get(cache_key)
+            if cached is not None:
+                context_results[purpose] = cached
+                logger.info(f"Query '{purpose}': {len(cached)} results (cached)")
+                continue
+
+            generation = self._context_generation
             try:
                 collection = self.get_collection(collection_name)
 
@@ -217,12 +386,13 @@ class CarlosDatabaseHandler:
                     if "timestamp" in timeframe_query and "timestamp" not in final_query:
                         final_query.update(timeframe_query)
 
-                # Execute query with limits and sorting
-                cursor = collection.find(final_query)
-                cursor = cursor.sort("timestamp", DESCENDING).limit(item.get("limit", 10))
+                # Execute query with limits and sorting; a negative limit (single batch) stays valid for batch_size
+                cursor = collection.find(final_query).batch_size(abs(limit))
+                cursor = cursor.sort("timestamp", DESCENDING).limit(limit)
                 
                 results = list(cursor)
                 context_results[purpose] = results
+                self._context_cache_put(cache_key, collection_name, results, generation)
                 
                 logger.info(f"Query '{purpose}': {len(results)} results")
                 
@@ -234,8 +404,9 @@ class CarlosDatabaseHandler:
                 context_results[purpose] = 'No results found'                
         return context_results
     
-    def retrieve_from_conversations(self, entities: List[str], semantic_tags: List[str], timeframe: str = "recent", limit: int = 5) -> List[Dict[str, Any]]:
+    def retrieve_from_conversations(self, entities: List[str], semantic_tags: List[str], timeframe: str = "recent", limit: int = 5, projection: Dict[str, int] = None) -> List[Dict[str, Any]]:
         """Retrieve relevant conversations based on entities, semantic tags, and timeframe."""
+        projection = projection or self.CONVERSATION_PROJECTION
         collection = self.get_collection("conversations")
         query = {"user_id": self.username}
 
@@ -250,7 +421,7 @@ class CarlosDatabaseHandler:
                 query.update(timeframe_query)
 
         try:
-            cursor = collection.find(query)
+            cursor = collection.find(query, projection=projection).batch_size(abs(limit))
             cursor = cursor.sort("timestamp", DESCENDING).limit(limit)
             results = list(cursor)
             logger.info(f"Retrieved {len(results)} conversations matching criteria")
@@ -265,21 +436,47 @@ class CuratorHandler:
     def __init__(self, db_handler: CarlosDatabaseHandler):
         self.db_handler = db_handler
 
-    def process_curator_output(self, curator_output: Dict[str, Any]) -> Dict[str, Any]:
-        """Process complete curator output."""
+    def process_curator_output(self, curator_output: Dict[str, Any], executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """Process complete curator output.
+
+        Fresh data is stored before context is retrieved, so a query can see what this same turn
+        just stored ("what did I just tell you"). With an executor, the store runs there alongside
+        retrieval, but only when no query reads a collection the store writes; otherwise ordering wins.
+        """
         logger.info("Processing curator output...")
+        fresh_data = curator_output.get("fresh_data_to_store")
+        queries = curator_output.get("context_retrieval_queries")
         
         # Store fresh data
-        if "fresh_data_to_store" in curator_output and curator_output["fresh_data_to_store"]:
-            self.db_handler.process_and_store_data(curator_output["fresh_data_to_store"])
+        store_future = None
+        if fresh_data:
+            read = {query.get("collection") for query in queries or ()}
+            if executor is not None and read.isdisjoint(self.db_handler.fresh_data_collections(fresh_data)):
+                store_future = executor.submit(self.db_handler.process_and_store_data, fresh_data)
+            else:
+                self.db_handler.process_and_store_data(fresh_data)
         
         # Retrieve context
         retrieved_context = {}
-        if "context_retrieval_queries" in curator_output and curator_output["context_retrieval_queries"]:
-            retrieved_context = self.db_handler.retrieve_context(curator_output["context_retrieval_queries"])
+        if queries:
+            retrieved_context = self.db_handler.retrieve_context(queries)
 
+        if store_future is not None:
+            store_future.result()
         return retrieved_context
 
+def mongo_json_default(o):
+    """orjson default hook for BSON types orjson doesn't serialize natively."""
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_json(obj: Any) -> str:
+    """Serialize Mongo documents to a JSON string with orjson (datetimes become ISO 8601)."""
+    return orjson.dumps(obj, default=mongo_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 class MongoJSONEncoder(json.JSONEncoder):
     """
     JSONEncoder subclass that handles ObjectId and datetime objects.
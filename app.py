@@ -82,8 +82,8 @@ def logout():
     username = session.pop('username', None)
     try:
         if username and username in _CARLOS_INSTANCES:
-            # Best-effort cleanup; Carlos doesn't expose close, so just drop ref
-            _CARLOS_INSTANCES.pop(username, None)
+            # Pending conversation writes are flushed once any request still using the instance finishes
+            _CARLOS_INSTANCES.pop(username).close()
     finally:
         return redirect(url_for('login'))
 
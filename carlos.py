@@ -1,13 +1,106 @@
 import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+import hashlib
 import os
-import json
+import orjson
+import threading
+import time
 from typing import Optional, Dict, Any
-from CarlosDatabase import CarlosDatabaseHandler, MongoJSONEncoder, CuratorHandler
+from pymongo import MongoClient
+from CarlosDatabase import CarlosDatabaseHandler, CuratorHandler, dumps_json
 import logging
 logger = logging.getLogger(__name__)
 
+# Prompt and schema files live next to this module, so loading doesn't depend on the working directory
+_PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "promts")
+# Sentence boundary used when chunking long inputs
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?]) +')
+# Database bookkeeping fields that mean nothing to the models
+_INTERNAL_DOC_FIELDS = frozenset(("_id", "user_id"))
+# Invariant directive for chunked curation; sent straight after the system prompt so it stays in the cached prefix
+_CHUNK_DIRECTIVE = {"role": "system", "content": "Long input split into chunks. Directive: Store all information for later synthesis."}
+
+
+def _iter_sentences(text: str):
+    """Yield the same pieces as _SENTENCE_SPLIT_RE.split(text) without building the whole list."""
+    start = 0
+    for match in _SENTENCE_SPLIT_RE.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+
+def _chunk_sentences(text: str, max_chunk_size: int) -> list[str]:
+    """Pack sentences into space-joined chunks of at most max_chunk_size characters where possible."""
+    chunks = []
+    current_chunk, current_len = [], 0
+    for sentence in _iter_sentences(text):
+        if current_len + len(sentence) + 1 <= max_chunk_size:
+            # An empty piece only ever trails a separator; it must not open a chunk of its own
+            if current_chunk or sentence:
+                current_len += len(sentence) + (1 if current_chunk else 0)
+                current_chunk.append(sentence)
+        else:
+            if current_chunk:
+                chunks.append(" ".join(current_chunk))
+            current_chunk, current_len = ([sentence], len(sentence)) if sentence else ([], 0)
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    return chunks
+
+
+def _text_digest(text: str) -> bytes:
+    """Compact cache key for a text; the curator and summary caches are separate, so one key space serves both."""
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def _sse(event: bytes, payload: dict) -> bytes:
+    """Encode one server-sent event frame; orjson escapes quotes and newlines in the payload."""
+    return b"event: " + event + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+
+_JSON_SCHEMA_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+}
+
+
+def _compile_schema_validator(response_format: dict):
+    """Build a validator for the top-level shape of a response_format JSON schema.
+
+    Resolves required keys and property types once so each check is a few dict
+    lookups; returns the error message, or None when the data fits the schema.
+    """
+    schema = response_format.get("json_schema", {}).get("schema", {})
+    required = tuple(schema.get("required", []))
+    property_types = {
+        name: prop["type"]
+        for name, prop in schema.get("properties", {}).items()
+        if prop.get("type") in _JSON_SCHEMA_TYPES
+    }
+
+    def validate(data: Any) -> Optional[str]:
+        if not isinstance(data, dict):
+            return f"expected object, got {type(data).__name__}"
+        missing = [key for key in required if key not in data]
+        if missing:
+            return f"missing required keys: {missing}"
+        for name, expected in property_types.items():
+            if name in data and not isinstance(data[name], _JSON_SCHEMA_TYPES[expected]):
+                return f"'{name}' should be {expected}, got {type(data[name]).__name__}"
+        return None
+
+    return validate
+
 # Phase 1: Perception & Ingestion
 # What happens: The Listener perceives the Speaker's utterance.
 
@@ -99,79 +192,284 @@ class Carlos:
     response_generator_system_prompt = ""
     summarizer_schema = ""
     summarizer_system_prompt = ""
+    # Upper bound for merged entities/semantic tags handed to the thinker
+    MAX_CONTEXT_ITEMS = 64
+    # Concurrent curator calls for chunked input; keeps LM Studio from being flooded
+    MAX_PARALLEL_CHUNKS = 4
+    # Stored text longer than this is summarised; also the length of the truncation fallback
+    SUMMARY_LENGTH = 150
+    # Input longer than this is split into sentence-aligned chunks before curating
+    MAX_CHUNK_SIZE = 4096
+    # Chunks packed into a single curator call for long input
+    CURATOR_BATCH_SIZE = 4
+    # Parsed curator analyses and summaries kept per instance, keyed by a hash of the input text
+    CURATOR_CACHE_SIZE = 512
+    SUMMARY_CACHE_SIZE = 4096
+    # Prompts, schemas and request templates shared by every instance; filled by _load_prompts
+    _PROMPTS = None
+    _PROMPTS_LOCK = threading.Lock()
+    HTTP_HEADERS = {
+        "Content-Type": "application/json",
+        "Connection": "keep-alive"
+    }
+    # (connect, read) timeouts; a stream's read timeout is the longest allowed gap between chunks.
+    # Completions are always streamed, so HTTP_TIMEOUT only covers short non-generating calls.
+    HTTP_TIMEOUT = (5, 300)
+    STREAM_TIMEOUT = (5, 60)
+    # Streamed text arriving faster than this is coalesced into one SSE token frame
+    STREAM_FLUSH_INTERVAL_NS = 8_000_000
     
-    def __init__(self, username: Optional[str] = None, password: Optional[str] = None, mongo_uri: Optional[str] = None, api_endpoint: Optional[str] = None):
-        """Initialize Carlos with MongoDB client and API endpoint."""
+    def __init__(self, username: Optional[str] = None, password: Optional[str] = None, mongo_uri: Optional[str] = None, api_endpoint: Optional[str] = None,
+                 db_event_listeners: Optional[list] = None, mongo_client: Optional[MongoClient] = None):
+        """Initialize Carlos with MongoDB client and API endpoint.
+
+        db_event_listeners are pymongo monitors for the client Carlos builds; mongo_client is an already
+        open client to use instead, which stays open when Carlos is closed.
+        """
         self.mongo_uri = mongo_uri or os.getenv("MONGO_URI", "mongodb://localhost:27017/carlos")
         self.api_endpoint = api_endpoint or os.getenv("API_ENDPOINT", "http://192.168.50.202:1234")
     
         self.username = username or os.getenv("CARLOS_USERNAME", "test_user")
         self.password = password or os.getenv("CARLOS_PASSWORD", "foobar")
+        self._user_tag = f"[username: {self.username}]"
         
-        self.db_handler = CarlosDatabaseHandler(self.mongo_uri, username)
+        # One pooled keep-alive session for all LLM hops instead of a new connection per call
+        self._session = requests.Session()
+        self._session.headers.update(self.HTTP_HEADERS)
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.1))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self.db_handler = CarlosDatabaseHandler(self.mongo_uri, username, event_listeners=db_event_listeners, client=mongo_client)
         self.curator_handler = CuratorHandler(self.db_handler)
+        # Database writes that overlap the live turn run here
+        self._io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix=f"carlos-io-{self.username}")
+        # Finished turns are archived here, apart from the io pool the live turn waits on
+        self._archive_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"carlos-archive-{self.username}")
+        # Summaries of archived turns are added afterwards, one LLM call at a time so live turns keep the backend
+        self._summary_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"carlos-summary-{self.username}")
+        # Set by close(); the pools are shut down once no turn is running
+        self._closing = threading.Event()
+        self._active_turns = 0
+        self._turns_lock = threading.Lock()
+        self._curator_cache = OrderedDict()  # chunk digest -> (context_retrieval_queries, context_focus, curiosity_analysis)
+        self._summary_cache = OrderedDict()  # digest -> summary
+        self._llm_cache_lock = threading.Lock()
 
         # Load systems prompts and schemas
         try:
-            with open("promts/curator_schema.json", "r") as f:
-                self.curator_schema = json.loads(f.read())
-            with open("promts/curator_system_prompt.txt", "r") as f:
-                self.curator_system_prompt = f.read()
-            with open("promts/thinker_schema.json", "r") as f:
-                self.thinker_schema = json.loads(f.read())
-            with open("promts/thinker_system_prompt.txt", "r") as f:
-                self.thinker_system_prompt = f.read()
-            with open("promts/response_generator_schema.json", "r") as f:
-                self.response_generator_schema = json.loads(f.read())
-            with open("promts/response_generator_system_prompt.txt", "r") as f:
-                self.response_generator_system_prompt = f.read()
-            with open("promts/summarizer_schema.json", "r") as f:
-                self.summarizer_schema = json.loads(f.read())
-            with open("promts/summarizer_system_prompt.txt", "r") as f:
-                self.summarizer_system_prompt = f.read()
-            logger.info("Loaded system prompts and schemas successfully")
+            vars(self).update(self._load_prompts())
         except Exception as e:
             logger.error(f"Error loading prompts/schemas: {e}")
             raise   
 
+    @classmethod
+    def _load_prompts(cls) -> dict[str, Any]:
+        """Read prompts and schemas once per process and build the request templates from them."""
+        with cls._PROMPTS_LOCK:
+            if cls._PROMPTS is None:
+                prompts = {}
+                for stage in ("curator", "thinker", "response_generator", "summarizer"):
+                    with open(os.path.join(_PROMPTS_DIR, f"{stage}_schema.json"), "rb") as f:
+                        prompts[f"{stage}_schema"] = orjson.loads(f.read())
+                    with open(os.path.join(_PROMPTS_DIR, f"{stage}_system_prompt.txt"), "r") as f:
+                        prompts[f"{stage}_system_prompt"] = f.read()
+                prompts["_validate_curator"] = _compile_schema_validator(prompts["curator_schema"])
+                prompts["_validate_thinker"] = _compile_schema_validator(prompts["thinker_schema"])
+                prompts["_validate_response"] = _compile_schema_validator(prompts["response_generator_schema"])
+                # Invariant part of each request body; per call only the dynamic messages are appended
+                prompts["_curator_template"] = cls._request_template(prompts["curator_system_prompt"], prompts["curator_schema"], temperature=0, max_tokens=-1, stream=False)
+                prompts["_curator_batch_template"] = cls._request_template(prompts["curator_system_prompt"], cls._batch_schema(prompts["curator_schema"], "chunks"), temperature=0, max_tokens=-1, stream=False)
+                prompts["_summarizer_template"] = cls._request_template(prompts["summarizer_system_prompt"], prompts["summarizer_schema"], temperature=0, max_tokens=100, stream=False)
+                prompts["_summarizer_batch_template"] = cls._request_template(prompts["summarizer_system_prompt"], cls._batch_schema(prompts["summarizer_schema"], "summaries"), temperature=0, max_tokens=100, stream=False)
+                prompts["_thinker_template"] = cls._request_template(prompts["thinker_system_prompt"], prompts["thinker_schema"], temperature=0, max_tokens=-1, stream=False)
+                prompts["_response_template"] = cls._request_template(prompts["response_generator_system_prompt"], prompts["response_generator_schema"], temperature=0.7)
+                cls._PROMPTS = prompts
+                logger.info("Loaded system prompts and schemas successfully")
+            return cls._PROMPTS
+
+    @staticmethod
+    def _request_template(system_prompt: str, schema: dict, **options) -> dict:
+        """Build the invariant part of a chat completion request."""
+        return {
+            "model": "carlos",
+            "messages": ({"role": "system", "content": system_prompt},),
+            "response_format": schema,
+            **options
+        }
+
+    @staticmethod
+    def _batch_schema(response_format: dict, key: str) -> dict:
+        """Wrap a response_format schema so the model returns an array of results under key."""
+        inner = response_format["json_schema"]
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": f"{inner['name']}_batch",
+                "strict": inner.get("strict", True),
+                "schema": {
+                    "type": "object",
+                    "properties": {key: {"type": "array", "items": inner["schema"]}},
+                    "required": [key]
+                }
+            }
+        }
+
+    @staticmethod
+    def _with_messages(template: dict, *messages: dict) -> dict:
+        """Shallow-copy a request template with per-call messages appended after the system prompt."""
+        return {**template, "messages": [*template["messages"], *messages]}
+
     def _api_talk(self, message: str, url: str) -> dict:
         """Send Message to API endpoint and return response."""
-        headers = {
-            "Content-Type": "application/json"
-        }
-        response = requests.post(f"{self.api_endpoint}/{url}", headers=headers, json=message)
+        response = self._session.post(f"{self.api_endpoint}/{url}", data=orjson.dumps(message), timeout=self.HTTP_TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
             logger.error(f"API error {response.status_code}: {response.text}")
-            logger.debug(f"Failed request payload: {json.dumps(message)}")
+            logger.debug(f"Failed request payload: {dumps_json(message)}")
             raise Exception(f"API error: {response.status_code} - {response.text}")
         
         
+    def _api_stream(self, message: dict, url: str):
+        """Send Message to API endpoint with streaming enabled and yield content deltas as they arrive."""
+        with self._session.post(f"{self.api_endpoint}/{url}", data=orjson.dumps({**message, "stream": True}), stream=True, timeout=self.STREAM_TIMEOUT) as response:
+            if response.status_code != 200:
+                logger.error(f"API error {response.status_code}: {response.text}")
+                raise Exception(f"API error: {response.status_code} - {response.text}")
+            for line in self._iter_stream_lines(response):
+                if not line.startswith(b"data: "):
+                    continue
+                json_str = line[6:].strip()
+                if json_str == b"[DONE]":
+                    break
+                try:
+                    data = orjson.loads(json_str)
+                except orjson.JSONDecodeError:
+                    logger.error(f"Failed to decode JSON from stream: {json_str}")
+                    continue
+                content_chunk = data.get("choices", [{}])[0].get("delta", {}).get("content", "")
+                if content_chunk:
+                    yield content_chunk
+
+    @staticmethod
+    def _iter_stream_lines(response):
+        """Yield the raw lines of a streamed body, splitting large reads in place instead of via iter_lines."""
+        tail = bytearray()
+        for chunk in response.iter_content(chunk_size=8192):
+            tail += chunk
+            start = 0
+            end = tail.find(b"\n")
+            while end != -1:
+                if end > start:
+                    yield bytes(tail[start:end])
+                start = end + 1
+                end = tail.find(b"\n", start)
+            del tail[:start]
+        if tail:
+            yield bytes(tail)
+
+    def _api_collect(self, message: dict, url: str) -> str:
+        """Stream a completion and return the assembled message content once generation finishes."""
+        return "".join(self._api_stream(message, url))
+
+    def _lru_get(self, cache: OrderedDict, key: bytes) -> Any:
+        with self._llm_cache_lock:
+            cached = cache.get(key)
+            if cached is not None:
+                cache.move_to_end(key)
+            return cached
+
+    def _lru_put(self, cache: OrderedDict, key: bytes, value: Any, max_size: int) -> None:
+        with self._llm_cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > max_size:
+                cache.popitem(last=False)
+
+    def _curator_cache_get(self, key: bytes) -> Optional[tuple]:
+        return self._lru_get(self._curator_cache, key)
+
+    def _curator_cache_put(self, key: bytes, parsed: tuple) -> None:
+        """Remember a parsed analysis; fresh data is left out since it has already been stored."""
+        if any(parsed):
+            self._lru_put(self._curator_cache, key, parsed[1:], self.CURATOR_CACHE_SIZE)
+
     def _curate(self, message: str, chunk: str=None) -> dict[str, Any]:
         """Send Message to curator model"""
-        curator_message = {
-            "model": "carlos",
-            "messages": [
-                {"role": "system", "content": self.curator_system_prompt},
-                {"role": "user", "content": message}
-            ],
-            "response_format": self.curator_schema,
-            "temperature": 0,
-            "max_tokens": -1,
-            "stream": False
-        }
-        if chunk:
-            curator_message["messages"].append({"role": "system", "content": f"Long input split into chunks. Directive: Store all information for later synthesis."})
-            curator_message["messages"].append({"role": "system", "content": f"Chunk info: {chunk}"})
+        # Only chunks are cached: a whole turn carries its timestamp, so it never repeats
+        key = _text_digest(message) if chunk else None
+        cached = self._curator_cache_get(key) if key else None
+        if cached is not None:
+            logger.debug("Curator cache hit")
+            return self._gather_context({}, *cached)
 
-        response = self._api_talk(curator_message, url="v1/chat/completions")
-        logger.debug(f"Curator response: {response}")
-        fresh_data_to_store, context_retrieval_queries, context_focus, curiosity_analysis = self._parse_curator_response(response)
+        if chunk:
+            curator_message = self._with_messages(
+                self._curator_template,
+                _CHUNK_DIRECTIVE,
+                {"role": "user", "content": message},
+                {"role": "system", "content": f"Chunk info: {chunk}"}
+            )
+        else:
+            curator_message = self._with_messages(self._curator_template, {"role": "user", "content": message})
+
+        content = self._api_collect(curator_message, url="v1/chat/completions")
+        logger.debug(f"Curator response: {content}")
+        parsed = self._parse_curator_response(content)
+        if key:
+            self._curator_cache_put(key, parsed)
+        return self._gather_context(*parsed)
+
+    def _curate_batch(self, chunks: list[str], first_index: int, total: int) -> list[dict[str, Any]]:
+        """Curate several chunks with one LLM call, falling back to per-chunk calls on a malformed reply."""
+        keys = [_text_digest(text) for text in chunks]
+        results = [None] * len(chunks)
+        pending = []
+        for i, key in enumerate(keys):
+            cached = self._curator_cache_get(key)
+            if cached is not None:
+                results[i] = self._gather_context({}, *cached)
+            else:
+                pending.append(i)
+
+        if len(pending) == 1:
+            i = pending[0]
+            results[i] = self._curate(chunks[i], chunk=f"Chunk {first_index + i + 1} of {total}")
+        elif pending:
+            numbered = "\n\n".join(
+                f"### Chunk {first_index + i + 1} of {total}\n{chunks[i]}" for i in pending
+            )
+            curator_message = self._with_messages(
+                self._curator_batch_template,
+                _CHUNK_DIRECTIVE,
+                {"role": "user", "content": numbered},
+                {"role": "system", "content": f"Batch info: {len(pending)} of {total} chunks. Return one analysis per chunk in 'chunks', in the same order."}
+            )
+            content = self._api_collect(curator_message, url="v1/chat/completions")
+            logger.debug(f"Curator batch response: {content}")
+            try:
+                analyses = orjson.loads(content).get("chunks")
+            except (orjson.JSONDecodeError, AttributeError):
+                analyses = None
+            if not isinstance(analyses, list) or len(analyses) != len(pending):
+                logger.warning(f"Curator batch returned malformed output for {len(pending)} chunks, curating individually")
+                for i in pending:
+                    results[i] = self._curate(chunks[i], chunk=f"Chunk {first_index + i + 1} of {total}")
+            else:
+                for i, analysis in zip(pending, analyses):
+                    parsed = self._unpack_curator_analysis(analysis)
+                    self._curator_cache_put(keys[i], parsed)
+                    results[i] = self._gather_context(*parsed)
+        return results
+
+    def _gather_context(self, fresh_data_to_store: dict, context_retrieval_queries: list, context_focus: dict, curiosity_analysis: dict) -> dict[str, Any]:
+        """Store fresh curator data and retrieve the context it asked for."""
+        # Fresh data is written on the io pool while context is retrieved here
         handler_output = self.curator_handler.process_curator_output({
             "fresh_data_to_store": fresh_data_to_store,
             "context_retrieval_queries": context_retrieval_queries,
-        })
+        }, executor=self._io_pool)
 
         from_conversations = self.db_handler.retrieve_from_conversations(
             entities=handler_output.get("entities", []),
@@ -180,16 +478,20 @@ class Carlos:
             limit=5
         )
 
-        # Summarize conversationhistory
+        # Summarize conversationhistory, all long fields in one summarizer call;
+        # turns stored with their summaries already need none
+        long_fields = []
         for conv in from_conversations:
-            if len(conv.get("user_input", "")) > 150:
-                conv["user_input_summary"] = self._summarize_for_memory(conv["user_input"])
-            else:
-                conv["user_input_summary"] = conv["user_input"]
-            if len(conv.get("assistant_response", "")) > 150:
-                conv["assistant_response_summary"] = self._summarize_for_memory(conv["assistant_response"])
-            else:
-                conv["assistant_response_summary"] = conv["assistant_response"]
+            for field in ("user_input", "assistant_response"):
+                if f"{field}_summary" in conv:
+                    continue
+                if len(conv.get(field, "")) > self.SUMMARY_LENGTH:
+                    long_fields.append((conv, field))
+                else:
+                    conv[f"{field}_summary"] = conv[field]
+        summaries = self._summarize_many([conv[field] for conv, field in long_fields])
+        for (conv, field), summary in zip(long_fields, summaries):
+            conv[f"{field}_summary"] = summary
         
         return {
             "context_focus": context_focus,
@@ -198,107 +500,163 @@ class Carlos:
             "from_conversations": from_conversations
         }
     
+    def _summarize_many(self, texts: list[str]) -> list[str]:
+        """Summarize several texts with one LLM call, falling back to per-text calls on a malformed reply."""
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if len(text) <= self.SUMMARY_LENGTH:
+                results[i] = text
+            else:
+                results[i] = self._lru_get(self._summary_cache, _text_digest(text))
+                if results[i] is None:
+                    pending.append(i)
+        if len(pending) <= 1:
+            for i in pending:
+                results[i] = self._summarize_for_memory(texts[i])
+            return results
+
+        numbered = "\n\n".join(f"### Text {n + 1}\n{texts[i]}" for n, i in enumerate(pending))
+        summary_prompt = self._with_messages(
+            self._summarizer_batch_template,
+            {"role": "user", "content": numbered},
+            {"role": "system", "content": f"Summarize each of the {len(pending)} texts separately. Return one summary per text in 'summaries', in the same order."}
+        )
+        # Same per-summary token budget as a single call
+        summary_prompt["max_tokens"] = self._summarizer_template["max_tokens"] * len(pending)
+        content = self._api_collect(summary_prompt, url="v1/chat/completions")
+        try:
+            summaries = orjson.loads(content or "{}").get("summaries")
+        except (orjson.JSONDecodeError, AttributeError):
+            summaries = None
+        if not isinstance(summaries, list) or len(summaries) != len(pending):
+            logger.warning(f"Batched summarization returned malformed output for {len(pending)} texts, summarizing individually")
+            for i in pending:
+                results[i] = self._summarize_for_memory(texts[i])
+            return results
+
+        for i, item in zip(pending, summaries):
+            summary = item.get("summary") if isinstance(item, dict) else None
+            if isinstance(summary, str):
+                self._lru_put(self._summary_cache, _text_digest(texts[i]), summary, self.SUMMARY_CACHE_SIZE)
+                results[i] = summary
+            else:
+                results[i] = texts[i][:self.SUMMARY_LENGTH]
+        return results
+
     def _summarize_for_memory(self, message: str) -> str:
         """Summarize message for long-term memory storage."""
-        summary_prompt = {
-            "model": "carlos",
-            "messages": [
-                {"role": "system", "content": self.summarizer_system_prompt},
-                {"role": "user", "content": message}
-            ],
-            "response_format": self.summarizer_schema,
-            "temperature": 0,
-            "max_tokens": 100,
-            "stream": False
-        }
-        response = self._api_talk(summary_prompt, url="v1/chat/completions")
-        if response.get("choices"):
+        # Text that already fits needs no summary
+        if len(message) <= self.SUMMARY_LENGTH:
+            return message
+        key = _text_digest(message)
+        cached = self._lru_get(self._summary_cache, key)
+        if cached is not None:
+            return cached
+
+        summary_prompt = self._with_messages(self._summarizer_template, {"role": "user", "content": message})
+        content = self._api_collect(summary_prompt, url="v1/chat/completions")
+        if content:
             try:
-                summary_data = json.loads(response["choices"][0].get("message", {}).get("content", "{}"))
-                return summary_data.get("summary", message[:150])
-            except json.JSONDecodeError:
+                summary_data = orjson.loads(content)
+            except orjson.JSONDecodeError:
                 logger.error("Failed to parse summarizer response as JSON")
-                return message[:150]
+                return message[:self.SUMMARY_LENGTH]
+            summary = summary_data.get("summary") if isinstance(summary_data, dict) else None
+            if not isinstance(summary, str):
+                return message[:self.SUMMARY_LENGTH]
+            self._lru_put(self._summary_cache, key, summary, self.SUMMARY_CACHE_SIZE)
+            return summary
         else:
-            logger.error("Summarization returned no choices")
-            return message[:150]
-
+            logger.error("Summarization returned no content")
+            return message[:self.SUMMARY_LENGTH]
+
+    @staticmethod
+    def _thinker_view(curator_analysis: dict) -> dict:
+        """Copy of the curator analysis without fields the thinker never uses, to keep the prompt short."""
+        view = dict(curator_analysis)
+        retrieved = curator_analysis.get("retrieved_context")
+        if isinstance(retrieved, dict):
+            view["retrieved_context"] = {
+                purpose: [
+                    {k: v for k, v in doc.items() if k not in _INTERNAL_DOC_FIELDS} if isinstance(doc, dict) else doc
+                    for doc in docs
+                ] if isinstance(docs, list) else docs
+                for purpose, docs in retrieved.items()
+            }
+        # Conversations carry both full text and summaries; the summaries are what the thinker should read
+        view["from_conversations"] = [
+            {k: v for k, v in conv.items() if f"{k}_summary" not in conv}
+            for conv in curator_analysis.get("from_conversations", [])
+        ]
+        return view
 
     def _think(self, message: str, curator_analysis: dict) -> tuple[dict[str, Any], bool]:
         """Think about the curator provided data. return true if we need to query curator."""
-        thinker_message = {
-            "model": "carlos",
-            "messages": [
-                {"role": "system", "content": self.thinker_system_prompt},
-                {"role": "system", "content": "Curator data: " + json.dumps(curator_analysis, cls=MongoJSONEncoder)},
-                {"role": "user", "content": f"Orginal user message: {message}"}
-            ],
-            "response_format": self.thinker_schema,
-            "temperature": 0,
-            "max_tokens": -1,
-            "stream": False
-        }
+        thinker_message = self._with_messages(
+            self._thinker_template,
+            {"role": "system", "content": "Curator data: " + dumps_json(self._thinker_view(curator_analysis))},
+            {"role": "user", "content": f"Orginal user message: {message}"}
+        )
 
-        response = self._api_talk(thinker_message, url="v1/chat/completions")
-        logger.debug(f"Thinker response: {response}")
+        content = self._api_collect(thinker_message, url="v1/chat/completions")
+        logger.debug(f"Thinker response: {content}")
         try:
-            think_data = json.loads(response.get("choices", [{}])[0].get("message", {}).get("content", "{}"))
-        except json.JSONDecodeError:
+            think_data = orjson.loads(content or "{}")
+        except orjson.JSONDecodeError:
             logger.error("Failed to parse thinker response as JSON")
             return {}, False
+        error = self._validate_thinker(think_data)
+        if error:
+            logger.error(f"Thinker response does not match schema: {error}")
+            return {}, False
         return think_data, False  # Flag lets add rethinking logic later
     
+    def _build_response_payload(self, think_data: dict[str, Any], message: str, timestamp: str) -> dict:
+        """Build the response generator request shared by chat and chat_stream."""
+        return self._with_messages(
+            self._response_template,
+            {"role": "system", "content": "Thinker data: " + dumps_json(think_data)},
+            {"role": "user", "content": f"Current time is {timestamp}\nOriginal user message: {message}"}
+        )
+
     def _build_response(self, think_data: dict[str, Any], message: str, timestamp: str) -> str:
-        response_message = {
-            "model": "carlos",
-            "messages": [
-                {"role": "system", "content": self.response_generator_system_prompt},
-                {"role": "system", "content": "Thinker data: " + json.dumps(think_data, cls=MongoJSONEncoder)},
-                {"role": "system", "content": f"Current time is {timestamp}"},
-                {"role": "user", "content": f"Original user message: {message}"}
-            ],
-            "response_format": self.response_generator_schema,
-            "temperature": 0.7,
-        }
-        response = self._api_talk(response_message, url="v1/chat/completions")
-        if response.get("choices"):
-            return response["choices"][0].get("message", {}).get("content", "")
+        response_message = self._build_response_payload(think_data, message, timestamp)
+        # Streamed so an unbounded generation is limited by the gap between chunks, not its total length
+        content = self._api_collect(response_message, url="v1/chat/completions")
+        if content:
+            return content
         else:
-            logger.error("Response generator returned no choices")
+            logger.error("Response generator returned no content")
             return "I'm not sure how to respond to that right now."
         
-    def _parse_curator_response(self, response: dict) -> tuple:
-        """Parse the curator response and extract relevant data."""
+    def _parse_curator_response(self, content: str) -> tuple:
+        """Parse the curator response content and extract relevant data."""
         try:
-            curator_analysis = json.loads(response.get("choices", [{}])[0].get("message", {}).get("content", ""))
-        except json.JSONDecodeError:
+            curator_analysis = orjson.loads(content)
+        except orjson.JSONDecodeError:
             logger.error("Failed to parse curator response as JSON")
             return {}, [], {}, {}
-        
-        fresh_data_to_store = curator_analysis.get("fresh_data_to_store", {})
-        context_retrieval_queries = curator_analysis.get("context_retrieval_queries", {})
-        context_focus = curator_analysis.get("context_focus", {})
-        curiosity_analysis = curator_analysis.get("curiosity_analysis", {})
-        return fresh_data_to_store, context_retrieval_queries, context_focus, curiosity_analysis
+        return self._unpack_curator_analysis(curator_analysis)
+
+    def _unpack_curator_analysis(self, curator_analysis: Any) -> tuple:
+        """Validate a parsed curator analysis and split it into its sections."""
+        # Reject malformed output before any of it is written to the database
+        error = self._validate_curator(curator_analysis)
+        if error:
+            logger.error(f"Curator response does not match schema: {error}")
+            return {}, [], {}, {}
+
+        return (
+            curator_analysis["fresh_data_to_store"],
+            curator_analysis["context_retrieval_queries"],
+            curator_analysis["context_focus"],
+            curator_analysis["curiosity_analysis"]
+        )
     
     def _process_big_input(self, message: str) -> dict[str, Any]:
-        """Split big input into smaller chunks if needed."""
-        max_chunk_size = 4096
-        if len(message) <= max_chunk_size:
-            return self._curate(message), self._summarize_for_memory(message)
-        # Split by sentences for better coherence
-        sentences = re.split(r'(?<=[.!?]) +', message)
-        chunks = []
-        current_chunk = ""
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) + 1 <= max_chunk_size:
-                current_chunk += (" " if current_chunk else "") + sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = sentence
-        if current_chunk:
-            chunks.append(current_chunk)
+        """Split big input into chunks, curate and summarise each, and merge the analyses."""
+        chunks = _chunk_sentences(message, self.MAX_CHUNK_SIZE)
         combined_analysis = {
             "context_focus": {},
             "curiosity_analysis": {},
@@ -307,173 +665,284 @@ class Carlos:
                 "semantic_tags": []
             }
         }
-        summary_chunks = []
+        # Salience filtering: count references across chunks, keep the most referenced
+        context_counters = {"entities": Counter(), "semantic_tags": Counter()}
         # TODO: test if we should think about chunked input and collect all that
         logger.info(f"Input message split into {len(chunks)} chunks for curation")
-        for i, chunk in enumerate(chunks):
-            logger.debug(f"Processing chunk {i+1}/{len(chunks)}")
-            chunk_analysis = self._curate(chunk, chunk=f"Chunk {i+1} of {len(chunks)}")
-            summary_chunks.append(self._summarize_for_memory(chunk))
+        # Pack chunks into batched curator calls; batches and per-chunk summaries are independent,
+        # so run them all concurrently, bounded to keep LM Studio from being flooded
+        batch_starts = range(0, len(chunks), self.CURATOR_BATCH_SIZE)
+        with ThreadPoolExecutor(max_workers=min(self.MAX_PARALLEL_CHUNKS, len(batch_starts) + len(chunks))) as pool:
+            batch_futures = [
+                pool.submit(self._curate_batch, chunks[start:start + self.CURATOR_BATCH_SIZE], start, len(chunks))
+                for start in batch_starts
+            ]
+            summary_futures = [pool.submit(self._summarize_for_memory, chunk) for chunk in chunks]
+            summary_chunks = [future.result() for future in summary_futures]
+            chunk_analyses = [analysis for future in batch_futures for analysis in future.result()]
+
+        entity_counter = context_counters["entities"]
+        tag_counter = context_counters["semantic_tags"]
+        context_focus = combined_analysis["context_focus"]
+        curiosity_analysis = combined_analysis["curiosity_analysis"]
+        for i, chunk_analysis in enumerate(chunk_analyses):
             # Combine retrieved context
-            for key in ["entities", "semantic_tags"]:
-                combined_analysis["retrieved_context"][key].extend(chunk_analysis.get("retrieved_context", {}).get(key, []))
+            # dict.fromkeys dedupes within the chunk in one ordered pass, so counts mean "chunks referencing"
+            retrieved = chunk_analysis.get("retrieved_context") or {}
+            entity_counter.update(dict.fromkeys(retrieved.get("entities", ())))
+            tag_counter.update(dict.fromkeys(retrieved.get("semantic_tags", ())))
             # Merge context_focus and curiosity_analysis (simple overwrite for now)
-            combined_analysis["context_focus"].update(chunk_analysis.get("context_focus", {}))
-            combined_analysis["curiosity_analysis"].update(chunk_analysis.get("curiosity_analysis", {}))
+            context_focus |= chunk_analysis.get("context_focus") or {}
+            curiosity_analysis |= chunk_analysis.get("curiosity_analysis") or {}
             logger.debug(f"Chunk analysis: {chunk_analysis} \n {i+1}/{len(chunks)}")
         
-        # Deduplicate entities and semantic tags
-        combined_analysis["retrieved_context"]["entities"] = list(set(combined_analysis["retrieved_context"]["entities"]))
-        combined_analysis["retrieved_context"]["semantic_tags"] = list(set(combined_analysis["retrieved_context"]["semantic_tags"]))
+        # Deduplicate entities and semantic tags, capped to the most referenced items
+        for key, counter in context_counters.items():
+            combined_analysis["retrieved_context"][key] = [item for item, _ in counter.most_common(self.MAX_CONTEXT_ITEMS)]
 
         return combined_analysis, summary_chunks
 
-    def chat(self, message: str) -> str:
-        """Process a chat message and return a response."""
-        timestamp = datetime.now().isoformat()
-        logger.info(f"Received message at {timestamp}: {message}")
-        message += f" [{timestamp}]"
-        message += f" [username: {self.username}]"
+    def _pipeline(self, message: str, timestamp: str) -> tuple[dict[str, Any], Any, str]:
+        """Run one turn through curator -> thinker -> response generator.
 
-        curator_analysis = self._process_big_input(message)
+        Returns the curator analysis, the summarised message and the response text.
+        """
+        # Short input (the common case) goes straight to the curator; its summary would go unused
+        if len(message) <= self.MAX_CHUNK_SIZE:
+            curator_analysis, summarised_message = self._curate(message), message
+        else:
+            curator_analysis, summarised_message = self._process_big_input(message)
         think_data, needs_curator = self._think(message, curator_analysis)
         if needs_curator:
             logger.info("Rethinking required, querying curator again...")
             # TODO: fire up curator again with thinker data
 
         response_text = self._build_response(think_data, message, timestamp)
-        # Store the conversation turn
-        self.db_handler.store_conversation(
-            user_input=message,
-            assistant_response=response_text,
-            entities=curator_analysis.get("retrieved_context", {}).get("entities", []),
-            semantic_tags=curator_analysis.get("retrieved_context", {}).get("semantic_tags", [])
-        )
-        return response_text
+        return curator_analysis, summarised_message, response_text
+
+    @contextmanager
+    def _turn(self):
+        """Mark a turn as running so close() leaves the pools it uses open until it finishes."""
+        with self._turns_lock:
+            if self._closing.is_set():
+                raise RuntimeError(f"Carlos for '{self.username}' is closed")
+            self._active_turns += 1
+        try:
+            yield
+        finally:
+            with self._turns_lock:
+                self._active_turns -= 1
+                last = self._closing.is_set() and self._active_turns == 0
+            if last:
+                self._shutdown()
+
+    def chat(self, message: str) -> str:
+        """Process a chat message and return a response."""
+        with self._turn():
+            timestamp = datetime.now().astimezone().isoformat()
+            logger.info(f"Received message at {timestamp}: {message}")
+            message = f"{message} [{timestamp}] {self._user_tag}"
+
+            curator_analysis, _, response_text = self._pipeline(message, timestamp)
+            # Store the conversation turn
+            self._store_in_background({
+                "user_input": message,
+                "assistant_response": response_text,
+                "entities": curator_analysis.get("retrieved_context", {}).get("entities", []),
+                "semantic_tags": curator_analysis.get("retrieved_context", {}).get("semantic_tags", [])
+            })
+            return response_text
     
     def chat_stream(self, message: str):
         """Generator to stream chat response."""
-        timestamp = datetime.now().isoformat()
+        with self._turn():
+            yield from self._stream_turn(message)
+
+    def _stream_turn(self, message: str):
+        timestamp = datetime.now().astimezone().isoformat()
         logger.info(f"Received message at {timestamp}: {message}")
-        message += f" [{timestamp}]"
-        message += f" [username: {self.username}]"
-        yield "event: status\ndata: {\"message\": \"thinking\"}\n\n"
-        curator_analysis, summarised_message = self._process_big_input(message)
-        yield "event: status\ndata: {\"message\": \"formulating\"}\n\n"
+        message = f"{message} [{timestamp}] {self._user_tag}"
+        yield _sse(b"status", {"message": "thinking"})
+        if len(message) <= self.MAX_CHUNK_SIZE:
+            curator_analysis, summarised_message = self._curate(message), message
+        else:
+            curator_analysis, summarised_message = self._process_big_input(message)
+        yield _sse(b"status", {"message": "formulating"})
         think_data, needs_curator = self._think(message, curator_analysis)
-        yield "event: status\ndata: {\"message\": \"pondering\"}\n\n"
+        yield _sse(b"status", {"message": "pondering"})
         if needs_curator:
             logger.info("Rethinking required, querying curator again...")
             # fire up curator again with thinker data
 
-        response_message = {
-            "model": "carlos",
-            "messages": [
-                {"role": "system", "content": self.response_generator_system_prompt},
-                {"role": "system", "content": "Thinker data: " + json.dumps(think_data, cls=MongoJSONEncoder)},
-                {"role": "system", "content": f"Current time is {timestamp}"},
-                {"role": "user", "content": f"Original user message: {message}"}
-            ],
-            "response_format": self.response_generator_schema,
-            "temperature": 0.7,
-            "stream": True,
-        }
-
-        emote_pattern = re.compile(r"(\[.*?\])")
-        
-        with requests.post(f"{self.api_endpoint}/v1/chat/completions", json=response_message, stream=True) as response:
-            response.raise_for_status()
-            buffer = ""
-            processed_content = ""
-            
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                decoded_line = line.decode('utf-8')
-                if decoded_line.startswith("data: "):
-                    json_str = decoded_line[5:].strip()
-                    if json_str == "[DONE]":
-                        break
-                    try:
-                        data = json.loads(json_str)
-                        delta = data.get("choices", [{}])[0].get("delta", {})
-                        content_chunk = delta.get("content", "")
-                        if content_chunk:
-                            buffer += content_chunk
-                            
-                            # Process complete emotes and text
-                            while True:
-                                emote_match = emote_pattern.search(buffer)
-                                if emote_match:
-                                    # Send text before emote
-                                    text_before = buffer[:emote_match.start()]
-                                    if text_before:
-                                        yield f"event: token\ndata: {json.dumps({'text': text_before})}\n\n"
-                                        processed_content += text_before
-                                    
-                                    # Send emote
-                                    emote_name = emote_match.group(1).strip("[]")
-                                    yield f"event: emote\ndata: {json.dumps({'name': emote_name})}\n\n"
-                                    processed_content += emote_match.group(1)
-                                    
-                                    # Remove processed part from buffer
-                                    buffer = buffer[emote_match.end():]
-                                else:
-                                    # No complete emote found, check if buffer might contain incomplete emote
-                                    bracket_pos = buffer.rfind('[')
-                                    if bracket_pos == -1:
-                                        # No opening bracket, send all as text
-                                        if buffer:
-                                            yield f"event: token\ndata: {json.dumps({'text': buffer})}\n\n"
-                                            processed_content += buffer
-                                            buffer = ""
-                                        break
-                                    else:
-                                        # Send text before potential incomplete emote
-                                        if bracket_pos > 0:
-                                            text_part = buffer[:bracket_pos]
-                                            yield f"event: token\ndata: {json.dumps({'text': text_part})}\n\n"
-                                            processed_content += text_part
-                                            buffer = buffer[bracket_pos:]
-                                        break
-                                        
-                    except json.JSONDecodeError:
-                        logger.error(f"Failed to decode JSON from stream: {json_str}")
-            
-            # Send any remaining buffer content
-            if buffer:
-                yield f"event: token\ndata: {json.dumps({'text': buffer})}\n\n"
-                processed_content += buffer
-        
-        try:
-            final_response_data = json.loads(processed_content)
-            assistant_response = final_response_data.get("response", processed_content)
-        except json.JSONDecodeError:
+        response_message = self._build_response_payload(think_data, message, timestamp)
+
+        # buffer holds the unsent tail of the response (sent text moves to sent_parts);
+        # everything before cursor has already been sent, and no unread emote starts before scan_from.
+        # Text is coalesced in pending_text and sent at most once per flush interval, or before an emote.
+        sent_parts = []
+        pending_text = []
+        last_flush = time.monotonic_ns()
+        buffer = ""
+        cursor = scan_from = 0
+        for content_chunk in self._api_stream(response_message, url="v1/chat/completions"):
+            buffer += content_chunk
+
+            # Emotes are [name] on a single line; find them with plain str.find over the unsent tail
+            while True:
+                open_pos = buffer.find("[", scan_from)
+                if open_pos == -1:
+                    # No opening bracket, send all as text
+                    end = len(buffer)
+                else:
+                    close_pos = buffer.find("]", open_pos + 1)
+                    if buffer.find("\n", open_pos + 1, len(buffer) if close_pos == -1 else close_pos) != -1:
+                        # A bracket followed by a line break before closing is just text
+                        scan_from = open_pos + 1
+                        continue
+                    if close_pos != -1:
+                        # Send text before emote, then the emote
+                        if open_pos > cursor:
+                            pending_text.append(buffer[cursor:open_pos])
+                        if pending_text:
+                            yield _sse(b"token", {"text": "".join(pending_text)})
+                            pending_text.clear()
+                        yield _sse(b"emote", {"name": buffer[open_pos:close_pos + 1].strip("[]")})
+                        last_flush = time.monotonic_ns()
+                        cursor = scan_from = close_pos + 1
+                        continue
+                    # Hold back a possibly incomplete emote until more arrives
+                    end = scan_from = open_pos
+                if end > cursor:
+                    pending_text.append(buffer[cursor:end])
+                    cursor = end
+                scan_from = max(scan_from, cursor)
+                break
+
+            now = time.monotonic_ns()
+            if pending_text and now - last_flush >= self.STREAM_FLUSH_INTERVAL_NS:
+                yield _sse(b"token", {"text": "".join(pending_text)})
+                pending_text.clear()
+                last_flush = now
+
+            # Keep buffer to the unsent tail so appends never copy the whole response
+            if cursor:
+                sent_parts.append(buffer[:cursor])
+                buffer = buffer[cursor:]
+                scan_from -= cursor
+                cursor = 0
+
+        # Send any remaining buffer content
+        pending_text.append(buffer)
+        if any(pending_text):
+            yield _sse(b"token", {"text": "".join(pending_text)})
+        sent_parts.append(buffer)
+        # Tell the client the reply is complete before any bookkeeping for this turn
+        yield _sse(b"close", {})
+        processed_content = "".join(sent_parts)
+
+        final_response_data = None
+        # Plain-text replies skip the decode attempt and its exception entirely
+        if processed_content.lstrip().startswith("{"):
+            try:
+                final_response_data = orjson.loads(processed_content)
+            except orjson.JSONDecodeError:
+                pass
+        if final_response_data is not None and self._validate_response(final_response_data) is None:
+            assistant_response = final_response_data["response_text"]
+        else:
             assistant_response = processed_content
         # Store the conversation turn
         # TODO: if user message is huge, we should store chunked analysis
-        if isinstance(summarised_message, list):
-            for summary in summarised_message:
-                self.db_handler.store_conversation(
-                    user_input=summary,
-                    assistant_response=assistant_response,
-                    entities=curator_analysis.get("retrieved_context", {}).get("entities", []),
-                    semantic_tags=curator_analysis.get("retrieved_context", {}).get("semantic_tags", [])
-                )
-        else:
-            self.db_handler.store_conversation(
-                user_input=message,
-                assistant_response=assistant_response,
-                entities=curator_analysis.get("retrieved_context", {}).get("entities", []),
-                semantic_tags=curator_analysis.get("retrieved_context", {}).get("semantic_tags", [])
-            )
+        user_inputs = summarised_message if isinstance(summarised_message, list) else [message]
+        entities = curator_analysis.get("retrieved_context", {}).get("entities", [])
+        semantic_tags = curator_analysis.get("retrieved_context", {}).get("semantic_tags", [])
+        # Chunk summaries of one turn go to Mongo as a single batch
+        self._store_in_background(*(
+            {"user_input": user_input, "assistant_response": assistant_response, "entities": entities, "semantic_tags": semantic_tags}
+            for user_input in user_inputs
+        ))
 
     def store_conversation(self, user_input: str, assistant_response: str, entities: list[str], semantic_tags: list[str]) -> None:
         """Public method to store a conversation turn."""
         self.db_handler.store_conversation(user_input, assistant_response, entities, semantic_tags)
 
+    def _store_in_background(self, *conversations: dict) -> None:
+        """Queue conversation turns for storage without blocking the reply."""
+        future = self._archive_pool.submit(self._store_then_summarize, conversations)
+        future.add_done_callback(self._log_store_failure)
+
+    def _store_then_summarize(self, conversations: tuple) -> None:
+        """Insert the turns right away, then queue summaries of their long fields as a follow-up update."""
+        if len(conversations) == 1:
+            ids = [self.db_handler.store_conversation(**conversations[0])]
+        else:
+            ids = self.db_handler.store_conversations_bulk(conversations)
+        if any(len(conversation[field]) > self.SUMMARY_LENGTH
+               for conversation in conversations for field in ("user_input", "assistant_response")):
+            future = self._summary_pool.submit(self._add_summaries, conversations, ids)
+            future.add_done_callback(self._log_summary_failure)
+
+    def _add_summaries(self, conversations: tuple, ids: list) -> None:
+        """Summarise long fields of stored turns so later retrievals can reuse them; until then reads summarise themselves."""
+        # Once closing has started the turn stays stored without summaries
+        if self._closing.is_set():
+            return
+        long_fields = [
+            (conversation_id, conversation, field)
+            for conversation_id, conversation in zip(ids, conversations)
+            for field in ("user_input", "assistant_response")
+            if len(conversation[field]) > self.SUMMARY_LENGTH
+        ]
+        # Chunk rows share one assistant response; summarise each distinct text once
+        texts = list(dict.fromkeys(conversation[field] for _, conversation, field in long_fields))
+        try:
+            summaries = dict(zip(texts, self._summarize_many(texts)))
+        except Exception as e:
+            logger.warning(f"Leaving stored conversation without summaries: {e}")
+            return
+        if self._closing.is_set():
+            return
+        updates = {}
+        for conversation_id, conversation, field in long_fields:
+            updates.setdefault(conversation_id, {})[f"{field}_summary"] = summaries[conversation[field]]
+        self.db_handler.add_conversation_summaries(updates)
+
+    @staticmethod
+    def _log_store_failure(future) -> None:
+        if future.exception() is not None:
+            logger.error(f"Failed to store conversation: {future.exception()}")
+
+    @staticmethod
+    def _log_summary_failure(future) -> None:
+        if future.exception() is not None:
+            logger.warning(f"Failed to add summaries to stored conversation: {future.exception()}")
+
+    def close(self) -> None:
+        """Stop taking turns and release workers and connections once the running turns have finished.
+
+        Without a running turn this happens before close() returns; otherwise the last turn to finish does it.
+        """
+        with self._turns_lock:
+            if self._closing.is_set():
+                return
+            self._closing.set()
+            idle = self._active_turns == 0
+        if idle:
+            self._shutdown()
+
+    def _shutdown(self) -> None:
+        """Wait for pending conversation writes, then release background workers and pooled connections."""
+        self._archive_pool.shutdown(wait=True)
+        # Summaries are optional: queued ones are dropped and a running one skips its write,
+        # but it is waited for so the session and client it uses are still open
+        self._summary_pool.shutdown(wait=True, cancel_futures=True)
+        self._io_pool.shutdown(wait=True)
+        # Every pool that can reach the LLM or MongoDB has drained by now: archive rows, summaries, live-turn writes
+        self._session.close()
+        self.db_handler.close()
+
     def get_debug_info(self, message: str) -> Dict[str, Any]:
-        response = requests.post(f"{self.api_endpoint}/debug", json={"message": message})
+        response = self._session.post(f"{self.api_endpoint}/debug", json={"message": message}, timeout=self.HTTP_TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
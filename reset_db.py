@@ -15,6 +15,7 @@ Usage:
 import argparse
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Optional
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
@@ -30,6 +31,9 @@ logger = logging.getLogger(__name__)
 class CarlosDBReset:
     """Handles database reset operations for Carlos AI system."""
     
+    # Concurrent server calls when counting or dropping across many collections/databases
+    MAX_WORKERS = 16
+    
     def __init__(self, mongo_uri: str = None):
         """Initialize with MongoDB connection."""
         self.mongo_uri = mongo_uri or os.getenv("MONGO_URI", "mongodb://localhost:27017")
@@ -58,6 +62,22 @@ class CarlosDBReset:
             logger.error(f"Error listing databases: {e}")
             return []
     
+    def get_collection_counts(self, db_names: List[str]) -> dict:
+        """Count documents in every collection of the given databases concurrently.
+
+        Counts come from collection metadata rather than a scan; they're only shown before a drop.
+        Returns {db_name: {collection_name: count}}, preserving collection order.
+        """
+        pairs = [(db_name, coll_name) for db_name in db_names for coll_name in self.client[db_name].list_collection_names()]
+        counts = {db_name: {} for db_name in db_names}
+        if not pairs:
+            return counts
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(pairs))) as executor:
+            results = executor.map(lambda pair: self.client[pair[0]][pair[1]].estimated_document_count(), pairs)
+            for (db_name, coll_name), count in zip(pairs, results):
+                counts[db_name][coll_name] = count
+        return counts
+    
     def list_databases(self):
         """List all Carlos databases and their collections."""
         carlos_dbs = self.get_carlos_databases()
@@ -67,17 +87,16 @@ class CarlosDBReset:
             return
         
         logger.info(f"Found {len(carlos_dbs)} Carlos database(s):")
+        all_counts = self.get_collection_counts(carlos_dbs)
         
         for db_name in carlos_dbs:
-            db = self.client[db_name]
-            collections = db.list_collection_names()
+            collections = list(all_counts[db_name])
             
             # Get some stats
             total_docs = 0
             collection_info = []
             
-            for coll_name in collections:
-                count = db[coll_name].count_documents({})
+            for coll_name, count in all_counts[db_name].items():
                 total_docs += count
                 collection_info.append(f"    - {coll_name}: {count} documents")
             
@@ -103,7 +122,7 @@ class CarlosDBReset:
             return True
         
         # Get stats before deletion
-        total_docs = sum(db[coll].count_documents({}) for coll in collections)
+        total_docs = sum(self.get_collection_counts([db_name])[db_name].values())
         
         logger.info(f"Resetting database for user '{username}'...")
         logger.info(f"Database: {db_name}")
@@ -143,12 +162,11 @@ class CarlosDBReset:
         db_info = []
         
         # Collect information about all databases
+        all_counts = self.get_collection_counts(carlos_dbs)
         for db_name in carlos_dbs:
-            db = self.client[db_name]
-            collections = db.list_collection_names()
-            db_docs = sum(db[coll].count_documents({}) for coll in collections)
+            db_docs = sum(all_counts[db_name].values())
             total_docs += db_docs
-            db_info.append(f"  - {db_name}: {len(collections)} collections, {db_docs} documents")
+            db_info.append(f"  - {db_name}: {len(all_counts[db_name])} collections, {db_docs} documents")
         
         logger.info(f"Found {len(carlos_dbs)} Carlos database(s) to reset:")
         for info in db_info:
@@ -159,13 +177,16 @@ class CarlosDBReset:
             return False
         
         success_count = 0
-        for db_name in carlos_dbs:
-            try:
-                self.client.drop_database(db_name)
-                logger.info(f"✓ Dropped database: {db_name}")
-                success_count += 1
-            except Exception as e:
-                logger.error(f"✗ Failed to drop database '{db_name}': {e}")
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(carlos_dbs))) as executor:
+            futures = {executor.submit(self.client.drop_database, db_name): db_name for db_name in carlos_dbs}
+            for future in as_completed(futures):
+                db_name = futures[future]
+                try:
+                    future.result()
+                    logger.info(f"✓ Dropped database: {db_name}")
+                    success_count += 1
+                except Exception as e:
+                    logger.error(f"✗ Failed to drop database '{db_name}': {e}")
         
         if success_count == len(carlos_dbs):
             logger.info(f"✅ Successfully reset all {success_count} Carlos databases")
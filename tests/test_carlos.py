@@ -1,37 +1,137 @@
 import os
+import re
+import socket
+import threading
 import time
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
 
 BASE = os.getenv("TEST_CARLOS_BASE", "http://localhost:5000")
+# Concurrent requests per noise burst; stays below the session's connection pool size
+NOISE_WORKERS = int(os.getenv("TEST_CARLOS_NOISE_WORKERS", "8"))
+# Run the top-level tests side by side, each as its own logged-in user
+PARALLEL = os.getenv("TEST_CARLOS_PARALLEL", "").lower() in ("1", "true", "yes")
+# Opt in to reusing the last run's login cookie; the reused user keeps that run's memories
+REUSE_LOGIN = os.getenv("TEST_CARLOS_REUSE_LOGIN", "").lower() in ("1", "true", "yes")
+COOKIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".carlos_test_cookies.json")
+COOKIE_TTL = 12 * 60 * 60  # seconds
+# Per-request rather than session-wide, so the login form keeps its own content type
+JSON_HEADERS = {"Content-Type": "application/json"}
 
-# Global session for maintaining login state
-_session = None
+# Reply checks, matched case-insensitively in a single scan each
+_CODENAME = re.compile(r"blue[ -]falcon", re.I)
+_PREF_LIGHT = re.compile(r"white|bright|light|minimalist", re.I)
+_PREF_DARK = re.compile(r"dark|black|gray", re.I)
+_STORY_ELEMENTS = re.compile(r"alex|detective|pocket watch|time|clockmaker", re.I)
+
+# Noise bursts, built once at import
+_HANDSHAKE_NOISE = tuple(f"Tell me a random fact about the number {i}." for i in range(20))  # Reduced for faster testing
+_PREF_FONT_NOISE = tuple(f"What font pairs well with a tech blog? Question #{i}" for i in range(10))  # Reduced for faster testing
+_PREF_GRID_NOISE = tuple(f"What grid layout do you recommend for a portfolio? Question #{i}" for i in range(10))
+_STORY_SCENES = tuple(f"Add a short scene about Alex investigating clues. Scene {i}." for i in range(8))  # Reduced for faster testing
+_STORY_TWISTS = tuple(f"Add a twist involving the watch's side-effects. Twist {i}." for i in range(8, 16))
+_STORY_CHASES = tuple(f"Describe a chase scene through the city. Scene {i}." for i in range(16, 24))
+_STORAGE_NOISE = tuple(f"What's the weather like? Random question {i}" for i in range(5))
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose sockets keep Nagle off and TCP keep-alive on."""
+
+    # urllib3's defaults already set TCP_NODELAY; passing socket_options replaces them, so extend rather than override
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+# Per-thread sessions for maintaining login state; every one is kept for logout
+_local = threading.local()
+_sessions = []
+_login_ids = count()
+
+
+def restore_login(session):
+    """Load the saved login cookie into session and return its username, or None if it is stale.
+    
+    Flask sessions are signed client-side cookies and /logout doesn't revoke them, so a cookie saved before
+    a logout still works; this only checks that the server accepts it, not that the login is still live.
+    """
+    try:
+        if time.time() - os.path.getmtime(COOKIE_FILE) > COOKIE_TTL:
+            return None
+        with open(COOKIE_FILE, "rb") as f:
+            saved = orjson.loads(f.read())
+        username, cookies = saved["username"], saved["cookies"]
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+        return None
+    session.cookies.update(requests.utils.cookiejar_from_dict(cookies))
+    # The chat page redirects to /login when the cookie carries no username
+    r = session.get(f"{BASE}/", allow_redirects=False, timeout=10)
+    if r.status_code != 200:
+        session.cookies.clear()
+        return None
+    return username
+
+
+def save_login(session, username):
+    """Save the session's cookies and their username for the next run."""
+    with open(COOKIE_FILE, "wb") as f:
+        f.write(orjson.dumps({"username": username, "cookies": requests.utils.dict_from_cookiejar(session.cookies)}))
 
 
 def get_session():
-    """Get or create a session with login."""
-    global _session
-    if _session is None:
-        _session = requests.Session()
-        # Log in with a test username
-        test_username = f"test_user_{int(time.time())}"
-        login_data = {"name": test_username}
-        login_response = _session.post(f"{BASE}/login", data=login_data, allow_redirects=False)
-        if login_response.status_code not in [302, 200]:  # Expect redirect after successful login
-            raise Exception(f"Login failed: {login_response.status_code} {login_response.text}")
+    """Get or create this thread's session with login."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        # One keep-alive pool to Carlos, wide enough for concurrent noise bursts
+        session.mount("http://", KeepAliveAdapter(pool_connections=1, pool_maxsize=16, max_retries=0))
+        session.headers["Connection"] = "keep-alive"
+        login_id = next(_login_ids)
+        # Only the first session is persisted; parallel tests still get users of their own
+        persist = REUSE_LOGIN and login_id == 0
+        test_username = restore_login(session) if persist else None
+        if test_username is None:
+            # Log in with a test username
+            test_username = f"test_user_{int(time.time())}_{login_id}"
+            login_data = {"name": test_username}
+            login_response = session.post(f"{BASE}/login", data=login_data, allow_redirects=False)
+            if login_response.status_code not in [302, 200]:  # Expect redirect after successful login
+                raise Exception(f"Login failed: {login_response.status_code} {login_response.text}")
+            if persist:
+                save_login(session, test_username)
         print(f"Logged in as: {test_username}")
-    return _session
+        _local.session = session
+        _sessions.append(session)
+    return session
 
 
-def send_message(text, debug=False):
-    """Send a message to Carlos and return the response."""
-    session = get_session()
+def send_message(text, debug=False, session=None, expect_reply=True):
+    """Send a message to Carlos and return the response, or None when the reply is not wanted."""
+    session = session or get_session()
     endpoint = "/api/chat"  # Only one endpoint available now
-    body = {"message": text}
-    r = session.post(f"{BASE}{endpoint}", json=body, timeout=120)
+    body = orjson.dumps({"message": text})
+    r = session.post(f"{BASE}{endpoint}", data=body, headers=JSON_HEADERS, timeout=120)
     r.raise_for_status()
-    return r.json()
+    if not expect_reply:
+        # The body has been read fully, which keeps the connection reusable; it's just never parsed
+        return None
+    return orjson.loads(r.content)
+
+
+def send_messages(texts):
+    """Send a burst of noise messages whose relative order does not matter, concurrently."""
+    session = get_session()  # Noise belongs to the calling test's user, not the pool threads
+    with ThreadPoolExecutor(max_workers=NOISE_WORKERS) as pool:
+        for _ in pool.map(lambda text: send_message(text, session=session, expect_reply=False), texts):
+            pass
 
 
 def test_secret_handshake():
@@ -45,10 +145,8 @@ def test_secret_handshake():
     
     # Add chat noise to test memory retention
     print("  Adding noise messages...")
-    for i in range(20):  # Reduced for faster testing
-        send_message(f"Tell me a random fact about the number {i}.")
-        if i % 5 == 0:
-            print(f"    sent {i} noise messages...")
+    send_messages(_HANDSHAKE_NOISE)
+    print("    sent 20 noise messages")
     
     # Test recall
     print("  Testing recall...")
@@ -57,7 +155,7 @@ def test_secret_handshake():
     print(f"  Carlos: {reply}")
     
     # Check if 'Blue Falcon' is mentioned
-    success = 'blue falcon' in reply.lower() or 'blue-falcon' in reply.lower()
+    success = bool(_CODENAME.search(reply))
     print(f"  ✅ SUCCESS: Recalled codename" if success else f"  ❌ FAILED: Did not recall codename")
     return success
 
@@ -71,16 +169,14 @@ def test_evolving_preferences():
     send_message("For my new website design, I'm thinking of using a very dark, black-and-gray theme.")
     
     # Add some noise
-    for i in range(10):  # Reduced for faster testing
-        send_message(f"What font pairs well with a tech blog? Question #{i}")
+    send_messages(_PREF_FONT_NOISE)
     
     # Change preference
     print("  Changing preference...")
     send_message("After looking at examples, the dark theme is too gloomy. I'm now leaning towards a bright, minimalist white theme.")
     
     # More noise
-    for i in range(10):
-        send_message(f"What grid layout do you recommend for a portfolio? Question #{i}")
+    send_messages(_PREF_GRID_NOISE)
     
     # Test preference recall
     print("  Testing preference recall...")
@@ -89,8 +185,8 @@ def test_evolving_preferences():
     print(f"  Carlos: {reply}")
     
     # Check if latest preference (white/bright) is mentioned
-    success = any(word in reply.lower() for word in ['white', 'bright', 'light', 'minimalist'])
-    dark_mentioned = any(word in reply.lower() for word in ['dark', 'black', 'gray'])
+    success = bool(_PREF_LIGHT.search(reply))
+    dark_mentioned = bool(_PREF_DARK.search(reply))
     
     if success and not dark_mentioned:
         print("  ✅ SUCCESS: Recalled latest preference (white/bright)")
@@ -112,24 +208,21 @@ def test_story_arc():
     send_message("Let's write a story. It begins with a detective named Alex finding a strange pocket watch.")
     
     # Add story elements with noise
-    for i in range(8):  # Reduced for faster testing
-        send_message(f"Add a short scene about Alex investigating clues. Scene {i}.")
+    send_messages(_STORY_SCENES)
     
     # Major plot point 1
     print("  Adding major plot point 1...")
     send_message("Alex discovers the watch can stop time for 10 seconds.")
     
     # More story elements
-    for i in range(8, 16):
-        send_message(f"Add a twist involving the watch's side-effects. Twist {i}.")
+    send_messages(_STORY_TWISTS)
     
     # Major plot point 2
     print("  Adding major plot point 2...")
     send_message("A mysterious villain, known only as 'The Clockmaker', tries to steal the watch from Alex.")
     
     # More story elements
-    for i in range(16, 24):
-        send_message(f"Describe a chase scene through the city. Scene {i}.")
+    send_messages(_STORY_CHASES)
     
     # Climax
     print("  Adding climax...")
@@ -142,8 +235,7 @@ def test_story_arc():
     print(f"  Carlos: {reply}")
     
     # Check if key story elements are present
-    key_elements = ['alex', 'detective', 'pocket watch', 'time', 'clockmaker']
-    present_elements = [elem for elem in key_elements if elem in reply.lower()]
+    present_elements = sorted(set(_STORY_ELEMENTS.findall(reply.lower())))
     
     success = len(present_elements) >= 4  # At least 4 out of 5 key elements
     print(f"  Key elements found: {present_elements}")
@@ -192,8 +284,7 @@ def test_memory_storage():
     send_message(f"I want to tell you something important: {unique_fact}")
     
     # Add some noise
-    for i in range(5):
-        send_message(f"What's the weather like? Random question {i}")
+    send_messages(_STORAGE_NOISE)
     
     # Try to retrieve the information
     res = send_message("What was that important thing I told you earlier about my lucky number?")
@@ -213,26 +304,28 @@ if __name__ == "__main__":
     
     results = {}
     
-    try:
+    tests = [
         # Test basic functionality first
-        results['basic'] = test_basic_functionality()
-        print()
-        
-        results['retrieval'] = test_memory_retrieval()
-        print()
-        
-        results['storage'] = test_memory_storage()
-        print()
-        
+        ('basic', test_basic_functionality),
+        ('retrieval', test_memory_retrieval),
+        ('storage', test_memory_storage),
         # Test memory capabilities
-        results['handshake'] = test_secret_handshake()
-        print()
-        
-        results['preferences'] = test_evolving_preferences()
-        print()
-        
-        results['story'] = test_story_arc()
-        print()
+        ('handshake', test_secret_handshake),
+        ('preferences', test_evolving_preferences),
+        ('story', test_story_arc),
+    ]
+    
+    try:
+        if PARALLEL:
+            # Output from concurrent tests interleaves; the summary below stays in order
+            with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+                futures = {name: pool.submit(test) for name, test in tests}
+            for name, future in futures.items():
+                results[name] = future.result()
+        else:
+            for name, test in tests:
+                results[name] = test()
+                print()
         
     except requests.HTTPError as e:
         print(f"❌ HTTP Error: {e.response.status_code}")
@@ -248,10 +341,10 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
     finally:
-        # Clean up session
-        if _session:
+        # Clean up sessions
+        for session in _sessions:
             try:
-                _session.post(f"{BASE}/logout")
+                session.post(f"{BASE}/logout")
             except:
                 pass
     
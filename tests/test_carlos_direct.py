@@ -1,59 +1,291 @@
+import atexit
 import os
+import queue
+import re
+import threading
 import time
 import json
 import logging
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import sys
 
-# Add parent directory to path so we can import carlos
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pymongo import monitoring
+
+if __name__ == "__main__":
+    # Run as a script; under pytest, tests/conftest.py puts the project root on sys.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from carlos import Carlos
+from CarlosDatabase import CarlosDatabaseHandler
 
 # Create logs directory if it doesn't exist
 LOGS_DIR = os.path.join(os.path.dirname(__file__), "logs")
-os.makedirs(LOGS_DIR, exist_ok=True)
+_MADE_DIRS = set()
+
+
+def _ensure_dir(path):
+    """Create path once per process; later calls for the same directory are a set lookup"""
+    if path not in _MADE_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _MADE_DIRS.add(path)
+
+
+_ensure_dir(LOGS_DIR)
 
 # Setup detailed logging
 TEST_RUN_ID = datetime.now().strftime("%Y%m%d_%H%M%S")
 LOG_FILE = os.path.join(LOGS_DIR, f"carlos_direct_test_{TEST_RUN_ID}.log")
 
-# Configure logging
+# CARLOS_TEST_VERBOSE=1 turns on DEBUG logging to the console and database stats snapshots between test phases
+VERBOSE = os.getenv("CARLOS_TEST_VERBOSE") == "1"
+
+# Configure logging; records are formatted on the calling thread and written by a listener thread
+_record_queue = queue.Queue()
+_log_handlers = [logging.FileHandler(LOG_FILE)]
+if VERBOSE:
+    _log_handlers.append(logging.StreamHandler())
+_log_listener = QueueListener(_record_queue, *_log_handlers)
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.DEBUG if VERBOSE else logging.WARNING,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(_record_queue)]
 )
+# Client libraries stay quiet even in verbose runs
+for _name in ("pymongo", "urllib3", "requests"):
+    logging.getLogger(_name).setLevel(logging.WARNING)
 
 logger = logging.getLogger('carlos_test')
 
+# CARLOS_TEST_PARALLEL=1 runs the detailed tests side by side when this file is run as a script
+PARALLEL = os.getenv("CARLOS_TEST_PARALLEL", "").lower() in ("1", "true", "yes")
+# Concurrent turns per chat_many burst
+NOISE_WORKERS = int(os.getenv("CARLOS_TEST_NOISE_WORKERS", "4"))
+
+# Last formatted timestamp as (epoch milliseconds, ISO string); replaced as a whole so threads never see a torn pair
+_last_timestamp = (0, "")
+
+
+def _timestamp():
+    """Current local time in ISO format, formatted at most once per millisecond"""
+    global _last_timestamp
+    ms = time.time_ns() // 1_000_000
+    cached_ms, text = _last_timestamp
+    if ms != cached_ms:
+        text = datetime.fromtimestamp(ms / 1000).isoformat(timespec="milliseconds")
+        _last_timestamp = (ms, text)
+    return text
+
+
+# Fixed pieces of each log_to_file record
+_BANNER = "=" * 80 + "\n"
+_RECORD_OPEN = "\n" + _BANNER
+_RECORD_CLOSE = "\n" + _BANNER + "\n"
+_RECORD_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+# Reply checks, matched case-insensitively in a single scan each
+_CODENAME = re.compile(r"blue[ -]falcon", re.I)
+_PREF_LIGHT = re.compile(r"white|bright|light|minimalist", re.I)
+_PREF_DARK = re.compile(r"dark|black|gray", re.I)
+_PROJECT_TERMS = re.compile(r"scraper|price|product|e-commerce", re.I)
+
+
+class BufferedSink:
+    """Pending records for one log file, written out with a single write() per flush"""
+    
+    __slots__ = ('fh', 'buf', 'size')
+    
+    FLUSH_SIZE = 1 << 20  # bytes
+    
+    def __init__(self, path):
+        self.fh = open(path, 'ab', buffering=0)
+        self.buf = []
+        self.size = 0
+    
+    def write(self, payload):
+        self.buf.append(payload)
+        self.size += len(payload)
+        if self.size >= self.FLUSH_SIZE:
+            self.flush()
+    
+    def flush(self):
+        if self.buf:
+            self.fh.write(b''.join(self.buf))
+            self.buf.clear()
+            self.size = 0
+    
+    def close(self):
+        self.flush()
+        self.fh.close()
+
+
+class LogWriter(threading.Thread):
+    """Background thread that owns the per-file log sinks and writes queued records to them"""
+    
+    FLUSH_INTERVAL = 1.0  # seconds
+    
+    def __init__(self):
+        super().__init__(name="carlos-test-log-writer", daemon=True)
+        self._queue = queue.Queue()
+        self._sinks = {}
+    
+    def write(self, path, payload):
+        self._queue.put_nowait((path, payload))
+    
+    def flush(self):
+        """Block until every record queued so far is on disk"""
+        if self.is_alive():
+            done = threading.Event()
+            self._queue.put_nowait((None, done))
+            done.wait()
+    
+    def stop(self):
+        if self.is_alive():
+            self._queue.put_nowait((None, None))
+            self.join()
+    
+    def run(self):
+        # A sink writes early only once it holds FLUSH_SIZE bytes; otherwise everything goes out once per interval
+        next_flush = time.monotonic() + self.FLUSH_INTERVAL
+        while True:
+            try:
+                path, payload = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                path, payload = None, False
+            if path is not None:
+                sink = self._sinks.get(path)
+                if sink is None:
+                    try:
+                        sink = self._sinks[path] = BufferedSink(path)
+                    except OSError as e:
+                        # Drop the record rather than let the writer die and silently swallow every later one
+                        logger.error(f"Cannot open log file {path}: {e}")
+                        continue
+                sink.write(payload)
+                if time.monotonic() < next_flush:
+                    continue
+            # Interval elapsed, flush request, or stop
+            for sink in self._sinks.values():
+                sink.flush()
+            next_flush = time.monotonic() + self.FLUSH_INTERVAL
+            if payload is None:
+                for sink in self._sinks.values():
+                    sink.close()
+                return
+            if isinstance(payload, threading.Event):
+                payload.set()
+
+
+_log_writer = LogWriter()
+_log_writer.start()
+_log_listener.start()
+# Stopped in reverse order: stdlib records first, then the per-file logs
+atexit.register(_log_writer.stop)
+atexit.register(_log_listener.stop)
+
+TEST_LOG_DIR = os.path.join(LOGS_DIR, f"test_run_{TEST_RUN_ID}")
+# Created up front: the log writer thread may open files here before any DetailedCarlosLogger exists
+_ensure_dir(TEST_LOG_DIR)
+
+
+def _format_record(data, description=""):
+    """Render one log_to_file record as bytes"""
+    timestamp = _timestamp()
+    parts = [_RECORD_OPEN, f"TIMESTAMP: {timestamp}\n"]
+    if description:
+        parts.append(f"DESCRIPTION: {description}\n")
+    parts.append(_BANNER)
+    if isinstance(data, (dict, list)):
+        parts.append(_RECORD_ENCODER.encode(data))
+    else:
+        parts.append(str(data))
+    parts.append(_RECORD_CLOSE)
+    return "".join(parts).encode('utf-8')
+
+
+class DatabaseOperationLogger(monitoring.CommandListener):
+    """Records the data commands sent to the watched Carlos databases, per database
+    
+    Attached only to the detailed tests' own MongoClient (via event_listeners), never registered process-wide.
+    """
+    
+    LOGGED_COMMANDS = frozenset(("find", "insert", "update", "delete", "aggregate", "count", "findAndModify"))
+    
+    def __init__(self):
+        self._operations = {}  # database name -> operations in issue order
+        self._log_path = os.path.join(TEST_LOG_DIR, "02_database_operations.log")
+    
+    def watch(self, database_name):
+        self._operations.setdefault(database_name, [])
+    
+    def operations_for(self, database_name):
+        return self._operations.get(database_name, [])
+    
+    def started(self, event):
+        if event.command_name not in self.LOGGED_COMMANDS:
+            return
+        operations = self._operations.get(event.database_name)
+        if operations is None:
+            return
+        command = event.command
+        query = command.get("filter") or command.get("pipeline") or command.get("query")
+        db_op = {
+            "operation": event.command_name,
+            "database": event.database_name,
+            "collection": command.get(event.command_name),
+            "query": str(query)[:500] if query else None,
+            "timestamp": _timestamp()
+        }
+        operations.append(db_op)
+        _log_writer.write(self._log_path, _format_record(db_op, f"DB {db_op['operation']} on {db_op['collection']}"))
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+
+_db_listener = DatabaseOperationLogger()
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_mongo_client():
+    """The one MongoClient the detailed tests' Carlos instances connect through, closed at exit
+    
+    Sharing the client pays for connection setup and server discovery once per run, while each
+    test still gets its own Carlos, user and database, so no test can recall another's memories.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/carlos")
+            _shared_client = CarlosDatabaseHandler.make_client(uri, "carlos-direct-tests", [_db_listener])
+            atexit.register(_shared_client.close)
+        return _shared_client
+
+
 class DetailedCarlosLogger:
     """Wrapper around Carlos to log all internal operations"""
     
     def __init__(self, username):
-        self.carlos = Carlos(username=username)
+        self.carlos = Carlos(username=username, mongo_client=shared_mongo_client())
+        _db_listener.watch(self.carlos.db_handler.db_name)
         self.username = username
-        self.test_log_dir = os.path.join(LOGS_DIR, f"test_run_{TEST_RUN_ID}")
-        os.makedirs(self.test_log_dir, exist_ok=True)
+        self.test_log_dir = TEST_LOG_DIR
+        _ensure_dir(self.test_log_dir)
         
     def log_to_file(self, filename, data, description=""):
-        """Log data to a specific file"""
-        filepath = os.path.join(self.test_log_dir, filename)
-        with open(filepath, 'a', encoding='utf-8') as f:
-            timestamp = datetime.now().isoformat()
-            f.write(f"\n{'='*80}\n")
-            f.write(f"TIMESTAMP: {timestamp}\n")
-            if description:
-                f.write(f"DESCRIPTION: {description}\n")
-            f.write(f"{'='*80}\n")
-            if isinstance(data, (dict, list)):
-                f.write(json.dumps(data, indent=2, ensure_ascii=False))
-            else:
-                f.write(str(data))
-            f.write(f"\n{'='*80}\n\n")
+        """Log data to a specific file; the write itself happens on the log writer thread"""
+        _log_writer.write(os.path.join(self.test_log_dir, filename), _format_record(data, description))
+    
+    def close(self):
+        """Close this test's Carlos, leaving the shared client open, and wait until its log records are on disk"""
+        self.carlos.close()
+        _log_writer.flush()
     
     def chat_with_logging(self, message, test_name=""):
         """Send message to Carlos with comprehensive logging"""
@@ -64,54 +296,31 @@ class DetailedCarlosLogger:
         self.log_to_file("01_user_messages.log", {
             "test_name": test_name,
             "message": message,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _timestamp()
         }, f"User input for {test_name}")
         
-        # Store original methods to intercept calls
-        original_chat = self.carlos.chat
-        
-        # Variables to capture internal data
-        curator_output = None
-        thinker_output = None
-        context_data = None
-        db_operations = []
-        
-        # Monkey patch to capture database operations
-        if hasattr(self.carlos, 'db'):
-            original_find = self.carlos.db.find if hasattr(self.carlos.db, 'find') else None
-            original_insert = self.carlos.db.insert_one if hasattr(self.carlos.db, 'insert_one') else None
-            original_update = self.carlos.db.update_one if hasattr(self.carlos.db, 'update_one') else None
-            
-            def log_db_operation(operation, collection, query=None, data=None, result=None):
-                db_op = {
-                    "operation": operation,
-                    "collection": collection,
-                    "query": query,
-                    "data": data,
-                    "result": str(result)[:500] if result else None,
-                    "timestamp": datetime.now().isoformat()
-                }
-                db_operations.append(db_op)
-                self.log_to_file("02_database_operations.log", db_op, f"DB {operation} on {collection}")
+        # Operations on this user's database issued while the turn runs, including concurrent turns'
+        db_operations = _db_listener.operations_for(self.carlos.db_handler.db_name)
+        first_operation = len(db_operations)
         
         try:
-            # Call the actual chat method
-            response = original_chat(message)
+            response = self.carlos.chat(message)
             
             # Log the response
             self.log_to_file("06_final_responses.log", {
                 "test_name": test_name,
                 "user_message": message,
                 "carlos_response": response,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _timestamp()
             }, f"Final response for {test_name}")
             
             # Log database operations summary
-            if db_operations:
+            turn_operations = db_operations[first_operation:]
+            if turn_operations:
                 self.log_to_file("02_database_operations_summary.log", {
                     "test_name": test_name,
-                    "total_operations": len(db_operations),
-                    "operations": db_operations
+                    "total_operations": len(turn_operations),
+                    "operations": turn_operations
                 }, f"All DB operations for {test_name}")
             
             logger.info(f"Chat completed for test: {test_name}")
@@ -125,24 +334,29 @@ class DetailedCarlosLogger:
                 "test_name": test_name,
                 "error": str(e),
                 "message": message,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _timestamp()
             }, f"Error in {test_name}")
             raise
     
+    def chat_many(self, messages, test_prefix):
+        """Send a burst of messages whose relative order does not matter, concurrently, and return the replies"""
+        with ThreadPoolExecutor(max_workers=NOISE_WORKERS) as pool:
+            return list(pool.map(
+                lambda item: self.chat_with_logging(item[1], f"{test_prefix}_{item[0]}"),
+                enumerate(messages)
+            ))
+    
     def get_database_stats(self):
         """Get current database statistics"""
         try:
             stats = {}
-            if hasattr(self.carlos, 'db') and self.carlos.db:
-                # Try to get collection stats
-                collections = ['messages', 'analyses', 'contexts', 'entities', 'events', 'user_state']
-                for collection_name in collections:
-                    try:
-                        collection = self.carlos.db[collection_name]
-                        count = collection.count_documents({})
-                        stats[collection_name] = count
-                    except Exception as e:
-                        stats[collection_name] = f"Error: {e}"
+            db = self.carlos.db_handler.db
+            # Collection metadata counts; no collection scans
+            for collection_name in db.list_collection_names():
+                try:
+                    stats[collection_name] = db[collection_name].estimated_document_count()
+                except Exception as e:
+                    stats[collection_name] = f"Error: {e}"
             
             self.log_to_file("03_database_stats.log", stats, "Database collection statistics")
             return stats
@@ -152,58 +366,66 @@ class DetailedCarlosLogger:
 
 
 def test_secret_handshake_detailed():
-    """Test Carlos's ability to recall specific information after noise."""
+    """Test Carlos's ability to recall specific information after noise.
+    
+    Database stats are only snapshotted between phases when CARLOS_TEST_VERBOSE=1.
+    """
     print("[TEST] Secret Handshake: recall project codename after noise (DETAILED)")
     
     carlos_logger = DetailedCarlosLogger(f"test_handshake_{int(time.time())}")
     
-    # Log initial database state
-    initial_stats = carlos_logger.get_database_stats()
-    print(f"  Initial DB stats: {initial_stats}")
-    
-    # Introduce unique fact
-    print("  Setting up secret project...")
-    response1 = carlos_logger.chat_with_logging(
-        "Hi there. By the way, my secret project codename is 'Blue Falcon'.",
-        "secret_setup"
-    )
-    print(f"  Carlos: {response1[:100]}...")
-    
-    # Check database after first message
-    after_setup_stats = carlos_logger.get_database_stats()
-    print(f"  DB stats after setup: {after_setup_stats}")
-    
-    # Add chat noise to test memory retention
-    print("  Adding noise messages...")
-    for i in range(5):  # Reduced for detailed logging
-        carlos_logger.chat_with_logging(
-            f"Tell me a random fact about the number {i}.",
-            f"noise_message_{i}"
+    try:
+        # Log initial database state
+        if VERBOSE:
+            initial_stats = carlos_logger.get_database_stats()
+            print(f"  Initial DB stats: {initial_stats}")
+        
+        # Introduce unique fact
+        print("  Setting up secret project...")
+        response1 = carlos_logger.chat_with_logging(
+            "Hi there. By the way, my secret project codename is 'Blue Falcon'.",
+            "secret_setup"
         )
-        if i % 2 == 0:
-            print(f"    sent {i+1} noise messages...")
-    
-    # Check database after noise
-    after_noise_stats = carlos_logger.get_database_stats()
-    print(f"  DB stats after noise: {after_noise_stats}")
-    
-    # Test recall
-    print("  Testing recall...")
-    recall_response = carlos_logger.chat_with_logging(
-        "A while back, I mentioned a secret project I was working on. Do you remember its codename?",
-        "recall_test"
-    )
-    print(f"  Carlos: {recall_response}")
-    
-    # Final database state
-    final_stats = carlos_logger.get_database_stats()
-    print(f"  Final DB stats: {final_stats}")
-    
-    # Check if 'Blue Falcon' is mentioned
-    success = 'blue falcon' in recall_response.lower() or 'blue-falcon' in recall_response.lower()
-    print(f"  ✅ SUCCESS: Recalled codename" if success else f"  ❌ FAILED: Did not recall codename")
-    
-    return success
+        print(f"  Carlos: {response1[:100]}...")
+        
+        # Check database after first message
+        if VERBOSE:
+            after_setup_stats = carlos_logger.get_database_stats()
+            print(f"  DB stats after setup: {after_setup_stats}")
+        
+        # Add chat noise to test memory retention
+        print("  Adding noise messages...")
+        carlos_logger.chat_many(  # Reduced for detailed logging
+            [f"Tell me a random fact about the number {i}." for i in range(5)],
+            "noise_message"
+        )
+        print("    sent 5 noise messages")
+        
+        # Check database after noise
+        if VERBOSE:
+            after_noise_stats = carlos_logger.get_database_stats()
+            print(f"  DB stats after noise: {after_noise_stats}")
+        
+        # Test recall
+        print("  Testing recall...")
+        recall_response = carlos_logger.chat_with_logging(
+            "A while back, I mentioned a secret project I was working on. Do you remember its codename?",
+            "recall_test"
+        )
+        print(f"  Carlos: {recall_response}")
+        
+        # Final database state
+        if VERBOSE:
+            final_stats = carlos_logger.get_database_stats()
+            print(f"  Final DB stats: {final_stats}")
+        
+        # Check if 'Blue Falcon' is mentioned
+        success = bool(_CODENAME.search(recall_response))
+        print(f"  ✅ SUCCESS: Recalled codename" if success else f"  ❌ FAILED: Did not recall codename")
+        
+        return success
+    finally:
+        carlos_logger.close()
 
 
 def test_evolving_preferences_detailed():
@@ -212,55 +434,56 @@ def test_evolving_preferences_detailed():
     
     carlos_logger = DetailedCarlosLogger(f"test_preferences_{int(time.time())}")
     
-    # Initial preference
-    print("  Setting initial preference...")
-    carlos_logger.chat_with_logging(
-        "For my new website design, I'm thinking of using a very dark, black-and-gray theme.",
-        "initial_preference"
-    )
-    
-    # Add some noise
-    for i in range(3):  # Reduced for detailed logging
+    try:
+        # Initial preference
+        print("  Setting initial preference...")
         carlos_logger.chat_with_logging(
-            f"What font pairs well with a tech blog? Question #{i}",
-            f"font_noise_{i}"
+            "For my new website design, I'm thinking of using a very dark, black-and-gray theme.",
+            "initial_preference"
         )
-    
-    # Change preference
-    print("  Changing preference...")
-    carlos_logger.chat_with_logging(
-        "After looking at examples, the dark theme is too gloomy. I'm now leaning towards a bright, minimalist white theme.",
-        "preference_change"
-    )
-    
-    # More noise
-    for i in range(3):
+        
+        # Add some noise
+        carlos_logger.chat_many(  # Reduced for detailed logging
+            [f"What font pairs well with a tech blog? Question #{i}" for i in range(3)],
+            "font_noise"
+        )
+        
+        # Change preference
+        print("  Changing preference...")
         carlos_logger.chat_with_logging(
-            f"What grid layout do you recommend for a portfolio? Question #{i}",
-            f"layout_noise_{i}"
+            "After looking at examples, the dark theme is too gloomy. I'm now leaning towards a bright, minimalist white theme.",
+            "preference_change"
         )
-    
-    # Test preference recall
-    print("  Testing preference recall...")
-    recall_response = carlos_logger.chat_with_logging(
-        "Okay, I'm ready to start. Based on our discussion, what color should the main background of the site be?",
-        "preference_recall"
-    )
-    print(f"  Carlos: {recall_response}")
-    
-    # Check if latest preference (white/bright) is mentioned
-    success = any(word in recall_response.lower() for word in ['white', 'bright', 'light', 'minimalist'])
-    dark_mentioned = any(word in recall_response.lower() for word in ['dark', 'black', 'gray'])
-    
-    if success and not dark_mentioned:
-        print("  ✅ SUCCESS: Recalled latest preference (white/bright)")
-        return True
-    elif dark_mentioned:
-        print("  ❌ FAILED: Recalled old preference (dark)")
-        return False
-    else:
-        print("  ⚠️  UNCLEAR: No clear preference mentioned")
-        return False
+        
+        # More noise
+        carlos_logger.chat_many(
+            [f"What grid layout do you recommend for a portfolio? Question #{i}" for i in range(3)],
+            "layout_noise"
+        )
+        
+        # Test preference recall
+        print("  Testing preference recall...")
+        recall_response = carlos_logger.chat_with_logging(
+            "Okay, I'm ready to start. Based on our discussion, what color should the main background of the site be?",
+            "preference_recall"
+        )
+        print(f"  Carlos: {recall_response}")
+        
+        # Check if latest preference (white/bright) is mentioned
+        success = bool(_PREF_LIGHT.search(recall_response))
+        dark_mentioned = bool(_PREF_DARK.search(recall_response))
+        
+        if success and not dark_mentioned:
+            print("  ✅ SUCCESS: Recalled latest preference (white/bright)")
+            return True
+        elif dark_mentioned:
+            print("  ❌ FAILED: Recalled old preference (dark)")
+            return False
+        else:
+            print("  ⚠️  UNCLEAR: No clear preference mentioned")
+            return False
+    finally:
+        carlos_logger.close()
 
 
 def test_memory_storage_detailed():
@@ -269,33 +492,35 @@ def test_memory_storage_detailed():
     
     carlos_logger = DetailedCarlosLogger(f"test_memory_{int(time.time())}")
     
-    # Store some information
-    unique_fact = f"My lucky number is 42 and today is test day {int(time.time())}"
-    print(f"  Storing: {unique_fact}")
-    carlos_logger.chat_with_logging(
-        f"I want to tell you something important: {unique_fact}",
-        "memory_storage"
-    )
-    
-    # Add some noise
-    for i in range(3):
+    try:
+        # Store some information
+        unique_fact = f"My lucky number is 42 and today is test day {int(time.time())}"
+        print(f"  Storing: {unique_fact}")
         carlos_logger.chat_with_logging(
-            f"What's the weather like? Random question {i}",
-            f"weather_noise_{i}"
+            f"I want to tell you something important: {unique_fact}",
+            "memory_storage"
         )
-    
-    # Try to retrieve the information
-    recall_response = carlos_logger.chat_with_logging(
-        "What was that important thing I told you earlier about my lucky number?",
-        "memory_retrieval"
-    )
-    
-    # Check if the information was retrieved
-    success = '42' in recall_response and 'test day' in recall_response
-    print(f"  Carlos: {recall_response[:100]}...")
-    print(f"  ✅ SUCCESS: Information retrieved" if success else f"  ❌ FAILED: Information not retrieved")
-    
-    return success
+        
+        # Add some noise
+        carlos_logger.chat_many(
+            [f"What's the weather like? Random question {i}" for i in range(3)],
+            "weather_noise"
+        )
+        
+        # Try to retrieve the information
+        recall_response = carlos_logger.chat_with_logging(
+            "What was that important thing I told you earlier about my lucky number?",
+            "memory_retrieval"
+        )
+        
+        # Check if the information was retrieved
+        success = '42' in recall_response and 'test day' in recall_response
+        print(f"  Carlos: {recall_response[:100]}...")
+        print(f"  ✅ SUCCESS: Information retrieved" if success else f"  ❌ FAILED: Information not retrieved")
+        
+        return success
+    finally:
+        carlos_logger.close()
 
 
 def test_conversation_flow_detailed():
@@ -304,33 +529,36 @@ def test_conversation_flow_detailed():
     
     carlos_logger = DetailedCarlosLogger(f"test_flow_{int(time.time())}")
     
-    # Start conversation
-    carlos_logger.chat_with_logging("Hello! I'm working on a Python project.", "greeting")
-    
-    # Add project details
-    carlos_logger.chat_with_logging(
-        "It's a web scraper that collects product prices from e-commerce sites.",
-        "project_description"
-    )
-    
-    # Ask for advice
-    advice_response = carlos_logger.chat_with_logging(
-        "What Python libraries would you recommend for this project?",
-        "advice_request"
-    )
-    
-    # Follow up
-    followup_response = carlos_logger.chat_with_logging(
-        "Thanks! Can you also remind me what my project was about?",
-        "project_recall"
-    )
-    
-    # Check if context was maintained
-    success = any(word in followup_response.lower() for word in ['scraper', 'price', 'product', 'e-commerce'])
-    print(f"  Final response: {followup_response[:100]}...")
-    print(f"  ✅ SUCCESS: Context maintained" if success else f"  ❌ FAILED: Context lost")
-    
-    return success
+    try:
+        # Start conversation
+        carlos_logger.chat_with_logging("Hello! I'm working on a Python project.", "greeting")
+        
+        # Add project details
+        carlos_logger.chat_with_logging(
+            "It's a web scraper that collects product prices from e-commerce sites.",
+            "project_description"
+        )
+        
+        # Ask for advice
+        advice_response = carlos_logger.chat_with_logging(
+            "What Python libraries would you recommend for this project?",
+            "advice_request"
+        )
+        
+        # Follow up
+        followup_response = carlos_logger.chat_with_logging(
+            "Thanks! Can you also remind me what my project was about?",
+            "project_recall"
+        )
+        
+        # Check if context was maintained
+        success = bool(_PROJECT_TERMS.search(followup_response))
+        print(f"  Final response: {followup_response[:100]}...")
+        print(f"  ✅ SUCCESS: Context maintained" if success else f"  ❌ FAILED: Context lost")
+        
+        return success
+    finally:
+        carlos_logger.close()
 
 
 if __name__ == "__main__":
@@ -342,19 +570,25 @@ if __name__ == "__main__":
     
     results = {}
     
+    # Test memory capabilities with detailed logging
+    tests = [
+        ('memory_storage', test_memory_storage_detailed),
+        ('handshake', test_secret_handshake_detailed),
+        ('preferences', test_evolving_preferences_detailed),
+        ('conversation', test_conversation_flow_detailed),
+    ]
+    
     try:
-        # Test memory capabilities with detailed logging
-        results['memory_storage'] = test_memory_storage_detailed()
-        print()
-        
-        results['handshake'] = test_secret_handshake_detailed()
-        print()
-        
-        results['preferences'] = test_evolving_preferences_detailed()
-        print()
-        
-        results['conversation'] = test_conversation_flow_detailed()
-        print()
+        if PARALLEL:
+            # Each test has its own Carlos, user and database, sharing only the MongoClient; output interleaves, the summary below stays in order
+            with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+                futures = {name: pool.submit(test) for name, test in tests}
+            for name, future in futures.items():
+                results[name] = future.result()
+        else:
+            for name, test in tests:
+                results[name] = test()
+                print()
         
     except Exception as e:
         logger.error(f"Test execution error: {e}")
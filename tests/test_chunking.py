@@ -0,0 +1,53 @@
+import os
+import random
+import re
+import sys
+if __name__ == "__main__":
+    # Run as a script; under pytest, tests/conftest.py puts the project root on sys.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import carlos
+
+
+def _baseline_chunks(message, max_chunk_size):
+    """The original string-concatenating splitter, kept as the reference for chunk parity."""
+    sentences = re.split(r'(?<=[.!?]) +', message)
+    chunks = []
+    current_chunk = ""
+    for sentence in sentences:
+        if len(current_chunk) + len(sentence) + 1 <= max_chunk_size:
+            current_chunk += (" " if current_chunk else "") + sentence
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = sentence
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def test_trailing_separator_adds_no_empty_chunk():
+    """Input ending in '. ' splits exactly like the baseline, with no empty chunk."""
+    sentence = "This sentence is exactly long enough."
+    message = " ".join([sentence] * 200) + ". "
+    chunks = carlos._chunk_sentences(message, 4096)
+    assert chunks == _baseline_chunks(message, 4096)
+    assert all(chunks)
+    # A full chunk right before the trailing separator used to leave a lone "" behind
+    full = "a" * 4095 + ". "
+    assert carlos._chunk_sentences(full, 4096) == _baseline_chunks(full, 4096) == ["a" * 4095 + "."]
+
+
+def test_chunk_parity_with_baseline():
+    """Randomised inputs chunk identically to the baseline splitter."""
+    rng = random.Random(0)
+    pieces = ["a", "bb", "ccc.", "!", " ", "  ", "x? ", ". "]
+    for _ in range(2000):
+        max_chunk_size = rng.randint(5, 60)
+        message = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 40)))
+        assert carlos._chunk_sentences(message, max_chunk_size) == _baseline_chunks(message, max_chunk_size)
+
+
+if __name__ == "__main__":
+    test_trailing_separator_adds_no_empty_chunk()
+    test_chunk_parity_with_baseline()
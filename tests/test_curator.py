@@ -1,27 +1,49 @@
 import json
 import os
 import sys
-sys.path.insert(0, os.getcwd())    # for command line
+if __name__ == "__main__":
+    # Run as a script; under pytest, tests/conftest.py puts the project root on sys.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import pytest
 
 import carlos
 
 
-def test_curator_output():
+MESSAGE = "Have i ever been in France?"
+
+# The request options that don't depend on the Carlos instance or the message
+_CURATOR_TEMPLATE_STATIC = {
+    "model": "carlos",
+    "temperature": 0,
+    "max_tokens": -1,
+    "stream": False
+}
+
+
+@pytest.fixture(scope="module")
+def carlos_instance():
+    """One Carlos shared by the curator tests.
+    
+    test_curator_output only calls the LLM and runs first; test_curator_output_wrapped stores
+    the curator's fresh data through _curate, so it stays last and nothing reads that state after it.
+    """
+    instance = carlos.Carlos(username="curator_test")
+    yield instance
+    instance.close()
+
+
+def test_curator_output(carlos_instance):
     """Test the curator output for a sample message."""
-    carlos_instance = carlos.Carlos(username="curator_test")
-    message = "Have i ever been in France?"
+    message = MESSAGE
     
     curator_message = {
-        "model": "carlos",
+        **_CURATOR_TEMPLATE_STATIC,
         "messages": [
             {"role": "system", "content": carlos_instance.curator_system_prompt},
             {"role": "user", "content": message}
         ],
-        "response_format": carlos_instance.curator_schema,
-        "temperature": 0,
-        "max_tokens": -1,
-        "stream": False
+        "response_format": carlos_instance.curator_schema
     }
     response = carlos_instance._api_talk(curator_message, url="v1/chat/completions")
 
@@ -41,7 +63,19 @@ def test_curator_output():
     assert isinstance(fresh_data, dict)
 
 
+def test_curator_output_wrapped(carlos_instance):
+    """Test the curator stage end to end through Carlos._curate; writes to the user's database, so keep it last."""
+    analysis = carlos_instance._curate(MESSAGE)
+
+    assert isinstance(analysis, dict)
+    for key in ("context_focus", "curiosity_analysis", "retrieved_context", "from_conversations"):
+        assert key in analysis
 
 
 if __name__ == "__main__":
-    test_curator_output()
+    instance = carlos.Carlos(username="curator_test")
+    try:
+        test_curator_output(instance)
+        test_curator_output_wrapped(instance)
+    finally:
+        instance.close()
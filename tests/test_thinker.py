@@ -1,6 +1,8 @@
 import os
 import sys
-sys.path.insert(0, os.getcwd())    # for command line
+if __name__ == "__main__":
+    # Run as a script; under pytest, tests/conftest.py puts the project root on sys.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 import carlos